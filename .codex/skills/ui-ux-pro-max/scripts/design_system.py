@@ -14,22 +14,35 @@ Usage:
 """
 
 import csv
+import gzip
+import hashlib
 import json
 import os
+import re
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+from core import (search, get_row_store, normalize_key, normalize_tokens, file_fingerprint, data_version, user_cache_dir,
+                  atomic_write, index_dir, prune_index_dir, reload_indexes, CSV_CONFIG, DATA_DIR, MAX_EDITS)
 
 
 # ============ CONFIGURATION ============
 REASONING_FILE = "ui-reasoning.csv"
+PAGE_WORKERS = 8  # Max threads rendering page override files in one persist call
+DESIGN_CACHE_VERSION = 4  # Bump when the generated design-system dict changes shape
+DESIGN_CACHE_MAX_ENTRIES = 500  # Cached design systems kept on disk (least recently used are evicted)
+DESIGN_CACHE_MAX_AGE = 30 * 24 * 3600  # Seconds since last use after which a cached entry is evicted
+CODE_FILES = ["core.py", "design_system.py"]  # Sources whose edits invalidate cached/materialized output
 
 SEARCH_CONFIG = {
     "product": {"max_results": 1},
     "style": {"max_results": 3},
     "color": {"max_results": 2},
-    "landing": {"max_results": 2},
-    "typography": {"max_results": 2}
+    # Product words ("plant", "coding") are seldom in these vocabularies: typo correction
+    # would rewrite them into unrelated terms ("plans", "coming"), so it is off here
+    "landing": {"max_results": 2, "max_edits": 0},
+    "typography": {"max_results": 2, "max_edits": 0}
 }
 
 
@@ -58,7 +71,7 @@ class DesignSystemGenerator:
                 combined_query = f"{query} {priority_query}"
                 results[domain] = search(combined_query, domain, config["max_results"])
             else:
-                results[domain] = search(query, domain, config["max_results"])
+                results[domain] = search(query, domain, config["max_results"], config.get("max_edits", MAX_EDITS))
         return results
 
     def _find_reasoning_rule(self, category: str) -> dict:
@@ -127,41 +140,61 @@ class DesignSystemGenerator:
         if not priority_keywords:
             return results[0]
 
+        priorities = [kw.lower().strip() for kw in priority_keywords]
+        profiles = [self._style_profile(result) for result in results]
+
         # First: try exact style name match
-        for priority in priority_keywords:
-            priority_lower = priority.lower().strip()
-            for result in results:
-                style_name = result.get("Style Category", "").lower()
+        for priority_lower in priorities:
+            for result, (fields, _) in zip(results, profiles):
+                style_name = fields.get("Style Category", "")
                 if priority_lower in style_name or style_name in priority_lower:
                     return result
 
-        # Second: score by keyword match in all fields
+        # Second: score by keyword match in the pre-lowercased fields
         scored = []
-        for result in results:
-            result_str = str(result).lower()
+        for result, (fields, row_text) in zip(results, profiles):
             score = 0
-            for kw in priority_keywords:
-                kw_lower = kw.lower().strip()
+            for kw_lower in priorities:
                 # Higher score for style name match
-                if kw_lower in result.get("Style Category", "").lower():
+                if kw_lower in fields.get("Style Category", ""):
                     score += 10
                 # Lower score for keyword field match
-                elif kw_lower in result.get("Keywords", "").lower():
+                elif kw_lower in fields.get("Keywords", ""):
                     score += 3
                 # Even lower for other field matches
-                elif kw_lower in result_str:
+                elif kw_lower in row_text:
                     score += 1
             scored.append((score, result))
 
         scored.sort(key=lambda x: x[0], reverse=True)
         return scored[0][1] if scored and scored[0][0] > 0 else results[0]
 
+    def _style_profile(self, result: dict) -> tuple:
+        """Return ({column: lowercase text}, whole row lowercased) for a style result from the row store."""
+        store = get_row_store("style")
+        row_id = store.row_id(result) if store else None
+        if row_id is not None and store.match_text:
+            return store.match_text[row_id]
+        # Result not backed by the store: lowercase it on the fly
+        return {col: str(value).lower() for col, value in result.items()}, str(result).lower()
+
     def _extract_results(self, search_result: dict) -> list:
         """Extract results list from search result dict."""
         return search_result.get("results", [])
 
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
+        # data_version must describe the rows the result was built from: if a store was swapped
+        # for its rebuilt version meanwhile, the searches may have mixed both, so generate again
+        for _ in range(3):
+            version = data_version(_design_stores())
+            design_system = self._generate(query, project_name)
+            if data_version(_design_stores()) == version:
+                break
+        design_system["data_version"] = version
+        return design_system
+
+    def _generate(self, query: str, project_name: str = None) -> dict:
         # Step 1: First search product to get category
         product_result = search(query, "product", 1)
         product_results = product_result.get("results", [])
@@ -169,19 +202,37 @@ class DesignSystemGenerator:
         if product_results:
             category = product_results[0].get("Product Type", "General")
 
-        # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
-        style_priority = reasoning.get("style_priority", [])
+        join = product_joins(self).get(category.lower()) if product_results else None
+        if join:
+            # Recognized product type: everything was pre-resolved at build time
+            reasoning = join["reasoning"]
+            # Single refinement search so explicit style words in the query still count;
+            # the product's own style candidates back it up
+            priority_query = " ".join(reasoning.get("style_priority", [])[:2])
+            style_results = self._extract_results(
+                search(f"{query} {priority_query}", "style", SEARCH_CONFIG["style"]["max_results"])) or join["styles"]
+            color_results = [join["color"]] if join["color"] else []
+            # products.csv names no font pairing and few landing.csv patterns, so these two have
+            # no join: they are searched with the query, falling back to the defaults below
+            typography_results = self._extract_results(
+                search(query, "typography", SEARCH_CONFIG["typography"]["max_results"], SEARCH_CONFIG["typography"]["max_edits"]))
+            landing_results = self._extract_results(
+                search(query, "landing", SEARCH_CONFIG["landing"]["max_results"], SEARCH_CONFIG["landing"]["max_edits"]))
+        else:
+            # Step 2: Get reasoning rules for this category
+            reasoning = self._apply_reasoning(category, {})
+            style_priority = reasoning.get("style_priority", [])
+
+            # Step 3: Multi-domain search with style priority hints
+            search_results = self._multi_domain_search(query, style_priority)
+            search_results["product"] = product_result  # Reuse product search
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+            style_results = self._extract_results(search_results.get("style", {}))
+            color_results = self._extract_results(search_results.get("color", {}))
+            typography_results = self._extract_results(search_results.get("typography", {}))
+            landing_results = self._extract_results(search_results.get("landing", {}))
 
         # Step 4: Select best matches from each domain using priority
-        style_results = self._extract_results(search_results.get("style", {}))
-        color_results = self._extract_results(search_results.get("color", {}))
-        typography_results = self._extract_results(search_results.get("typography", {}))
-        landing_results = self._extract_results(search_results.get("landing", {}))
 
         best_style = self._select_best_match(style_results, reasoning.get("style_priority", []))
         best_color = color_results[0] if color_results else {}
@@ -236,6 +287,329 @@ class DesignSystemGenerator:
         }
 
 
+# ============ PRODUCT JOIN TABLES ============
+JOIN_FORMAT_VERSION = 3  # Bump when the join entry layout or resolution rules change
+JOIN_DOMAINS = ["product", "color", "style"]  # Read through their row stores, plus REASONING_FILE
+
+_product_joins = (None, {})  # (fingerprint, table)
+_product_joins_lock = threading.Lock()
+
+
+def _resolve_named_rows(domain: str, names: list) -> list:
+    """Rows whose key column matches the given names: exactly, else by prefix/containment."""
+    store = get_row_store(domain)
+    if store is None:
+        return []
+    rows = []
+    seen = set()
+    for name in names:
+        key = normalize_key(re.sub(r"\(.*?\)", "", name))
+        if not key:
+            continue
+        ids = store.by_key.get(key)
+        if ids is None:
+            ids = next((i for k, i in store.by_key.items() if k.startswith(key) or key in k), None)
+        idx = ids[0] if ids else None
+        if idx is not None and idx not in seen:
+            seen.add(idx)
+            rows.append(dict(store.rows[idx]))
+    return rows
+
+
+def _build_product_join(generator: "DesignSystemGenerator", product: dict) -> dict:
+    """Pre-resolve reasoning, color and style rows for one product row."""
+    category = product.get("Product Type", "")
+    reasoning = generator._apply_reasoning(category, {})
+    product_text = f"{category} {product.get('Keywords', '')}"
+
+    style_names = product.get("Primary Style Recommendation", "").split("+")
+    style_names += product.get("Secondary Styles", "").split(",")
+    style_names += reasoning.get("style_priority", [])
+    styles = _resolve_named_rows("style", style_names)
+
+    colors = _resolve_named_rows("color", [category]) or search(product_text, "color", 1).get("results", [])
+    return {
+        "reasoning": reasoning,
+        "styles": styles[:SEARCH_CONFIG["style"]["max_results"] + 2],
+        "color": colors[0] if colors else None
+    }
+
+
+def product_joins(generator: "DesignSystemGenerator" = None) -> dict:
+    """
+    Product type (lowercase) -> pre-resolved design-system inputs.
+
+    Built once from products.csv against the other data files and published as a
+    JSON artifact in the shared index dir, keyed by the fingerprints of every store
+    and file it reads, so other processes and skill copies load it instead of
+    rebuilding. Tables for older data or code are pruned with the row store artifacts.
+    """
+    global _product_joins
+    fingerprint = _join_fingerprint()
+    if _product_joins[0] == fingerprint:
+        return _product_joins[1]
+
+    with _product_joins_lock:
+        if _product_joins[0] == fingerprint:
+            return _product_joins[1]
+        artifact = index_dir() / f"product-joins-{fingerprint[:32]}.json"
+        try:
+            with open(artifact, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+            try:
+                os.utime(artifact)  # Keeps it from being pruned as unused
+            except OSError:
+                pass
+        except (OSError, ValueError):
+            generator = generator or DesignSystemGenerator()
+            products = get_row_store("product")
+            table = {}
+            for product in (products.rows if products else []):
+                table.setdefault(product.get("Product Type", "").lower(), _build_product_join(generator, product))
+            if _join_fingerprint() != fingerprint:
+                return table  # A store was swapped mid-build: the table matches no key, so it is not cached
+            try:
+                artifact.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write(artifact, json.dumps(table, ensure_ascii=False))
+                prune_index_dir(artifact.parent)
+            except OSError:
+                pass
+        _product_joins = (fingerprint, table)
+        return table
+
+
+def _join_fingerprint() -> str:
+    """Key of the product join table: format, generator source and every input it reads."""
+    return hashlib.sha256(json.dumps(
+        [JOIN_FORMAT_VERSION, _code_version(), file_fingerprint(DATA_DIR / REASONING_FILE)]
+        + [_store_fingerprint(domain) for domain in JOIN_DOMAINS]).encode("utf-8")).hexdigest()
+
+
+# ============ RESULT CACHE ============
+def _store_fingerprint(domain: str) -> str:
+    """Fingerprint of the data a domain is searched in: its loaded store's, else its CSV's.
+
+    A loaded store lags its CSV while being rebuilt; an unloaded one would be
+    built from the CSV as it is now.
+    """
+    store = get_row_store(domain, load=False)
+    return store.fingerprint if store is not None else file_fingerprint(DATA_DIR / CSV_CONFIG[domain]["file"])
+
+
+def _design_stores() -> list:
+    """Loaded row stores design-system generation searches (the others count with their CSV in data_version)."""
+    return [store for store in (get_row_store(domain, load=False) for domain in SEARCH_CONFIG) if store is not None]
+
+
+def _design_data_fingerprints() -> dict:
+    """Fingerprint of every CSV design-system generation consults, as seen through its row store."""
+    data_files = {CSV_CONFIG[domain]["file"]: _store_fingerprint(domain) for domain in SEARCH_CONFIG}
+    data_files[REASONING_FILE] = file_fingerprint(DATA_DIR / REASONING_FILE)
+    return data_files
+
+
+def _code_version() -> str:
+    """Digest of the generator's source, so code changes invalidate stored output without a manual bump."""
+    scripts_dir = Path(__file__).resolve().parent
+    return hashlib.sha256("".join(file_fingerprint(scripts_dir / name) for name in CODE_FILES).encode("utf-8")).hexdigest()
+
+
+def _prune_design_cache(cache_dir: Path):
+    """Evict cached design systems unused for DESIGN_CACHE_MAX_AGE, then the oldest beyond DESIGN_CACHE_MAX_ENTRIES."""
+    entries = []
+    now = time.time()
+    for path in cache_dir.glob("*.json"):
+        try:
+            mtime = path.stat().st_mtime
+            if now - mtime > DESIGN_CACHE_MAX_AGE:
+                path.unlink()
+            else:
+                entries.append((mtime, path))
+        except OSError:
+            pass  # Removed concurrently
+    entries.sort(reverse=True)
+    for _, path in entries[DESIGN_CACHE_MAX_ENTRIES:]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _design_cache_key(query: str, project_name: str = None) -> str:
+    """Cache key: normalized query, resolved project name, generator source and a fingerprint of every CSV consulted."""
+    key = {
+        "version": DESIGN_CACHE_VERSION,
+        "code": _code_version(),
+        "query": " ".join(query.lower().split()),
+        "project_name": project_name or query.upper(),
+        "data": _design_data_fingerprints()
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def generate_cached(query: str, project_name: str = None, generator: "DesignSystemGenerator" = None,
+                    use_cache: bool = True) -> dict:
+    """
+    Return the design-system dict for a query, from the on-disk cache when possible.
+
+    Entries live under <user cache dir>/design-systems/ and are keyed by the data
+    file fingerprints and the generator source, so editing any consulted CSV or
+    the code invalidates them automatically. Entries are kept in least recently
+    used order (by mtime) and pruned to DESIGN_CACHE_MAX_ENTRIES / _MAX_AGE.
+    """
+    if not use_cache:
+        return (generator or DesignSystemGenerator()).generate(query, project_name)
+
+    cache_file = user_cache_dir() / "design-systems" / f"{_design_cache_key(query, project_name)}.json"
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            design_system = json.load(f)
+        # The key only covers the files generation reads; report the current version of the whole data set
+        design_system["data_version"] = data_version(_design_stores())
+        try:
+            os.utime(cache_file)  # Mark as recently used for eviction
+        except OSError:
+            pass
+        return design_system
+    except (OSError, ValueError):
+        pass
+
+    design_system = lookup_materialized(query, project_name)
+    if design_system is not None:
+        return design_system
+
+    design_system = (generator or DesignSystemGenerator()).generate(query, project_name)
+    if _design_cache_key(query, project_name) != cache_file.stem:
+        return design_system  # A store was swapped while generating: the key no longer describes the result
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(cache_file, json.dumps(design_system, ensure_ascii=False))
+        _prune_design_cache(cache_file.parent)
+    except OSError:
+        pass  # The cache is an optimization; an unwritable cache dir must not fail generation
+    return design_system
+
+
+# ============ MATERIALIZED DESIGN SYSTEMS ============
+MATERIALIZE_MODIFIERS = ["", "dark", "minimal"]  # Generated for every product type
+MATERIALIZED_FILE = "materialized-design-systems.json.gz"
+_PROJECT_FIELDS = ("project_name", "data_version")  # Per-request fields left out of the artifact
+
+_materialized = (None, {})  # (artifact mtime/size stamp, artifact dict)
+_materialized_lock = threading.Lock()
+
+
+def _materialized_key(query: str) -> str:
+    """Order- and punctuation-insensitive key, so near-identical queries share an entry."""
+    return " ".join(sorted(normalize_tokens(query)))
+
+
+def _materialized_fingerprint() -> str:
+    return hashlib.sha256(json.dumps(
+        [DESIGN_CACHE_VERSION, _code_version(), _design_data_fingerprints()], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _load_materialized() -> dict:
+    """The materialized artifact (reloaded when the file changes), or {} if there is none."""
+    global _materialized
+    path = index_dir() / MATERIALIZED_FILE
+    try:
+        st = path.stat()
+    except OSError:
+        return {}
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _materialized[0] != stamp:
+        with _materialized_lock:
+            if _materialized[0] != stamp:
+                try:
+                    with gzip.open(path, 'rt', encoding='utf-8') as f:
+                        _materialized = (stamp, json.load(f))
+                except (OSError, ValueError):
+                    _materialized = (stamp, {})
+    return _materialized[1]
+
+
+def lookup_materialized(query: str, project_name: str = None):
+    """Serve a design system from the materialized artifact if the query is a known entry and the data is unchanged."""
+    artifact = _load_materialized()
+    if not artifact or artifact.get("fingerprint") != _materialized_fingerprint():
+        return None
+    entry = artifact.get("entries", {}).get(_materialized_key(query))
+    if entry is None:
+        return None
+    design_system = {"project_name": project_name or query.upper()}
+    design_system.update(json.loads(json.dumps(entry)))  # Callers may mutate the result
+    design_system["data_version"] = data_version(_design_stores())
+    return design_system
+
+
+def materialize_design_systems(modifiers: list = None) -> dict:
+    """
+    Generate the design system for every product type (plus modifiers) and store them in a compact artifact.
+
+    Also compares the new entries with the previous artifact, so CSV edits can be
+    reviewed as drift in the generated design systems.
+
+    Returns:
+        dict with artifact path, entry count, size and per-entry drift
+    """
+    modifiers = MATERIALIZE_MODIFIERS if modifiers is None else modifiers
+    reload_indexes()  # Build from the CSVs as they are now, not from stores whose rebuild is pending
+    fingerprint, version = _materialized_fingerprint(), data_version(_design_stores())
+    generator = DesignSystemGenerator()
+    products = get_row_store("product")
+
+    entries = {}
+    for product in (products.rows if products else []):
+        for modifier in modifiers:
+            query = f"{product.get('Product Type', '')} {modifier}".strip()
+            key = _materialized_key(query)
+            if key and key not in entries:
+                design_system = generator.generate(query)
+                entries[key] = {k: v for k, v in design_system.items() if k not in _PROJECT_FIELDS}
+
+    previous = _load_materialized().get("entries", {})
+    drift = {}
+    for key, entry in entries.items():
+        if key in previous and previous[key] != entry:
+            drift[key] = sorted(field for field in entry if entry.get(field) != previous[key].get(field))
+    removed = sorted(set(previous) - set(entries))
+
+    artifact = {
+        "fingerprint": fingerprint,
+        "data_version": version,
+        "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "entries": entries
+    }
+    path = index_dir() / MATERIALIZED_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = gzip.compress(json.dumps(artifact, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), mtime=0)
+    atomic_write(path, payload)
+
+    return {
+        "artifact": str(path),
+        "count": len(entries),
+        "bytes": len(payload),
+        "drift": drift,
+        "added": sorted(set(entries) - set(previous)) if previous else [],
+        "removed": removed
+    }
+
+
+def format_materialize_report(report: dict) -> str:
+    """Format a materialize_design_systems report as plain text."""
+    lines = [f"Materialized {report['count']} design systems -> {report['artifact']} ({report['bytes'] / 1024:.1f} KB)"]
+    if report["drift"]:
+        lines.append(f"Drift vs previous artifact: {len(report['drift'])} changed")
+        for key, fields in sorted(report["drift"].items()):
+            lines.append(f"  ~ {key}: {', '.join(fields)}")
+    for key in report["added"]:
+        lines.append(f"  + {key}")
+    for key in report["removed"]:
+        lines.append(f"  - {key}")
+    return "\n".join(lines)
+
+
 # ============ OUTPUT FORMATTERS ============
 BOX_WIDTH = 90  # Wider box for more content
 
@@ -459,47 +833,191 @@ def format_markdown(design_system: dict) -> str:
 
 
 # ============ MAIN ENTRY POINT ============
+def generate_design_system_dict(query: str, project_name: str = None, persist: bool = False, page=None,
+                                output_dir: str = None, use_cache: bool = True) -> dict:
+    """
+    Design system as the raw dict from DesignSystemGenerator.generate, without any string rendering.
+
+    Same arguments as generate_design_system, minus output_format.
+
+    Returns:
+        dict with project_name, category, pattern, style, colors, typography,
+        key_effects, anti_patterns, decision_rules, severity and data_version
+    """
+    design_system = generate_cached(query, project_name, use_cache=use_cache)
+
+    # Persist to files if requested
+    if persist:
+        persist_design_system(design_system, page, output_dir, query)
+    return design_system
+
+
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
-                           persist: bool = False, page: str = None, output_dir: str = None) -> str:
+                           persist: bool = False, page=None, output_dir: str = None,
+                           use_cache: bool = True) -> str:
     """
     Main entry point for design system generation.
 
     Args:
         query: Search query (e.g., "SaaS dashboard", "e-commerce luxury")
         project_name: Optional project name for output header
-        output_format: "ascii" (default) or "markdown"
+        output_format: "ascii" (default), "markdown" or "json"
         persist: If True, save design system to design-system/ folder
-        page: Optional page name for page-specific override file
+        page: Optional page name (or list of page names) for page-specific override files
         output_dir: Optional output directory (defaults to current working directory)
+        use_cache: If True (default), reuse a cached result for the same query and data files
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
-    
-    # Persist to files if requested
-    if persist:
-        persist_design_system(design_system, page, output_dir, query)
+    design_system = generate_design_system_dict(query, project_name, persist, page, output_dir, use_cache)
 
+    if output_format == "json":
+        return json.dumps(design_system, indent=2, ensure_ascii=False)
     if output_format == "markdown":
         return format_markdown(design_system)
     return format_ascii_box(design_system)
 
 
+# ============ MANIFEST (BULK) GENERATION ============
+def load_manifest(path: str) -> list:
+    """
+    Load a project manifest (JSON, or YAML when PyYAML is installed).
+
+    The manifest is a list of entries, or a dict with a "projects" list. Each entry:
+        query (required), project_name, pages (list or comma-separated string), output_dir
+
+    Relative output directories are resolved against the manifest's folder.
+    """
+    manifest_path = Path(path)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        if manifest_path.suffix.lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML manifests require PyYAML (pip install pyyaml); use a .json manifest instead")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    entries = data.get("projects", []) if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError(f"Manifest must be a list of projects: {path}")
+
+    projects = []
+    for i, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict) or not entry.get("query"):
+            raise ValueError(f"Manifest entry {i} needs a 'query'")
+        output_dir = Path(entry.get("output_dir") or ".")
+        if not output_dir.is_absolute():
+            output_dir = manifest_path.parent / output_dir
+        projects.append({
+            "query": entry["query"],
+            "project_name": entry.get("project_name") or entry.get("name"),
+            "pages": normalize_pages(entry.get("pages")),
+            "output_dir": str(output_dir)
+        })
+    return projects
+
+
+_worker_generator = None
+
+
+def _warm_worker():
+    """Process pool initializer: load the reasoning rules and every index the generator uses."""
+    global _worker_generator
+    _worker_generator = DesignSystemGenerator()
+    for domain in ("product", "style", "color", "landing", "typography", "ux"):
+        get_row_store(domain)
+
+
+def _generate_project(project: dict) -> dict:
+    """Generate and persist one manifest entry, reporting timing and written files."""
+    if _worker_generator is None:
+        _warm_worker()
+    started = time.perf_counter()
+    report = {"project_name": project.get("project_name"), "query": project["query"]}
+    try:
+        design_system = generate_cached(project["query"], project.get("project_name"), _worker_generator)
+        persisted = persist_design_system(design_system, project.get("pages"), project.get("output_dir"), project["query"])
+        report.update({
+            "project_name": design_system["project_name"],
+            "status": "success",
+            "design_system_dir": persisted["design_system_dir"],
+            "written_files": persisted["written_files"],
+            "unchanged_files": persisted["unchanged_files"]
+        })
+    except Exception as e:
+        report.update({"status": "error", "error": str(e)})
+    report["seconds"] = round(time.perf_counter() - started, 4)
+    return report
+
+
+def generate_from_manifest(manifest, workers: int = None) -> dict:
+    """
+    Generate and persist design systems for every project in a manifest.
+
+    Projects are spread over a process pool whose workers load the indexes once
+    and reuse them for all the projects they handle.
+
+    Args:
+        manifest: Path to a manifest file, or an already loaded list of projects
+        workers: Number of worker processes (default: CPU count, capped at the project count)
+
+    Returns:
+        dict with per-project reports (timing, output paths, status) and totals
+    """
+    projects = load_manifest(manifest) if isinstance(manifest, (str, Path)) else manifest
+    workers = max(1, min(workers or os.cpu_count() or 1, len(projects) or 1))
+    started = time.perf_counter()
+
+    if workers == 1:
+        reports = [_generate_project(project) for project in projects]
+    else:
+        # Imported here: concurrent.futures.process pulls in multiprocessing, which every
+        # other search.py invocation would otherwise pay for at startup
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+            reports = list(pool.map(_generate_project, projects))
+
+    return {
+        "projects": reports,
+        "count": len(reports),
+        "failed": sum(1 for r in reports if r["status"] != "success"),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - started, 4)
+    }
+
+
+def format_manifest_report(summary: dict) -> str:
+    """Format a generate_from_manifest summary as a plain-text report."""
+    lines = [f"Generated {summary['count']} design systems in {summary['seconds']:.2f}s "
+             f"({summary['workers']} workers, {summary['failed']} failed)", ""]
+    for report in summary["projects"]:
+        if report["status"] == "success":
+            changed = len(report["written_files"])
+            total = changed + len(report["unchanged_files"])
+            lines.append(f"  [ok]    {report['project_name']}  {report['seconds']:.3f}s  "
+                         f"{report['design_system_dir']}  ({changed}/{total} files written)")
+        else:
+            lines.append(f"  [error] {report['project_name'] or report['query']}  {report['seconds']:.3f}s  {report['error']}")
+    return "\n".join(lines)
+
+
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+def persist_design_system(design_system: dict, page=None, output_dir: str = None, page_query: str = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
     
     Args:
         design_system: The generated design system dictionary
-        page: Optional page name for page-specific override file
+        page: Optional page name, or list of page names, for page-specific override files
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
     
     Returns:
-        dict with created file paths and status
+        dict with status, all target paths (created_files) and which of them
+        were actually modified (written_files) or left as-is (unchanged_files)
     """
     base_dir = Path(output_dir) if output_dir else Path.cwd()
     
@@ -511,34 +1029,101 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     pages_dir = design_system_dir / "pages"
     
     created_files = []
+    written_files = []
+    unchanged_files = []
     
     # Create directories
     design_system_dir.mkdir(parents=True, exist_ok=True)
     pages_dir.mkdir(parents=True, exist_ok=True)
     
-    master_file = design_system_dir / "MASTER.md"
+    outputs = [(design_system_dir / "MASTER.md", format_master_md(design_system))]
     
-    # Generate and write MASTER.md
-    master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
-    created_files.append(str(master_file))
+    # If pages are specified, create page override files with intelligent content.
+    # Each page runs its own searches, so render them concurrently against the warm indexes.
+    pages = normalize_pages(page)
+    if pages:
+        for domain in ("style", "ux", "landing"):
+            get_row_store(domain)
+        from concurrent.futures import ThreadPoolExecutor  # Only persisting with pages needs the pool
+        with ThreadPoolExecutor(max_workers=min(len(pages), PAGE_WORKERS)) as pool:
+            page_contents = list(pool.map(
+                lambda name: format_page_override_md(design_system, name, page_query), pages))
+        for name, content in zip(pages, page_contents):
+            outputs.append((pages_dir / f"{page_slug(name)}.md", content))
     
-    # If page is specified, create page override file with intelligent content
-    if page:
-        page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+    for path, content in outputs:
+        created_files.append(str(path))
+        if _write_if_changed(path, content):
+            written_files.append(str(path))
+        else:
+            unchanged_files.append(str(path))
     
     return {
         "status": "success",
         "design_system_dir": str(design_system_dir),
-        "created_files": created_files
+        "created_files": created_files,
+        "written_files": written_files,
+        "unchanged_files": unchanged_files
     }
 
 
+def normalize_pages(page) -> list:
+    """Turn a page name, comma-separated names or a list of names into a de-duplicated list."""
+    if not page:
+        return []
+    names = [page] if isinstance(page, str) else list(page)
+    pages = []
+    seen = set()
+    for name in names:
+        for part in str(name).split(","):
+            part = part.strip()
+            if part and page_slug(part) not in seen:
+                seen.add(page_slug(part))
+                pages.append(part)
+    return pages
+
+
+def page_slug(page: str) -> str:
+    """File name (without extension) of a page override file."""
+    return page.lower().replace(' ', '-')
+
+
+def read_pages_file(path: str) -> list:
+    """Read page names from a file: one per line, blank lines and # comments ignored."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _content_hash(content: str) -> str:
+    """Hash file content, ignoring the volatile "Generated:" timestamp line."""
+    stable = "\n".join(line for line in content.splitlines() if "**Generated:**" not in line)
+    return hashlib.sha256(stable.encode("utf-8")).hexdigest()
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """
+    Atomically write content to path unless the file already holds the same content.
+
+    The new content is written to a temp file in the same directory and renamed
+    over the target, so readers (and file watchers) never see a partial file.
+
+    Returns:
+        True if the file was written, False if it was left untouched
+    """
+    mode = None
+    if path.exists():
+        mode = path.stat().st_mode & 0o777
+        try:
+            existing = path.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            existing = None
+        if existing is not None and _content_hash(existing) == _content_hash(content):
+            return False
+
+    atomic_write(path, content, mode)
+    return True
+
+
 def format_master_md(design_system: dict) -> str:
     """Format design system as MASTER.md with hierarchical override logic."""
     project = design_system.get("project_name", "PROJECT")
@@ -565,6 +1150,8 @@ def format_master_md(design_system: dict) -> str:
     lines.append(f"**Project:** {project}")
     lines.append(f"**Generated:** {timestamp}")
     lines.append(f"**Category:** {design_system.get('category', 'General')}")
+    if design_system.get("data_version"):
+        lines.append(f"**Data Version:** {design_system['data_version']}")
     lines.append("")
     lines.append("---")
     lines.append("")
@@ -3,22 +3,65 @@
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
-       python search.py "<query>" --design-system [-p "Project Name"]
-       python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py "<query>" --design-system [-p "Project Name"] [-f ascii|markdown|json]
+       python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard" "settings" ...]
+       python search.py "<query>" --design-system --persist [-p "Project Name"] --pages-file pages.txt
+       python search.py --manifest projects.json [--workers 4] [--json]
+
+Quote multi-word terms to rank exact phrases first (style, ux, react, web and stacks): python search.py '"dark mode" oled' --domain style
+Filter on categorical columns (Severity, Platform, Category, Type, Complexity, Library, ...):
+  python search.py "animation" --domain ux --filter Severity=High --filter Platform=Web
+Compact machine output (search, stacks, related, design system): --compact columns|tsv|msgpack
+Fit output to a token budget (drops e.g. code examples before Do/Don't): add --budget 400
+Page through results: each page ends with "--cursor <token>"; rerun the same command with it appended
+Count matches per category/severity without fetching them all: add --facets [COLUMN ...]
+A query that is exactly a row name (e.g. "Glassmorphism", "Fintech/Crypto") returns that row directly.
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
 Stacks: html-tailwind, react, nextjs
 
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
-  --page       Also create a page-specific override file in design-system/pages/
+  --page       Also create page-specific override files in design-system/pages/ (one or more pages)
+  --pages-file Read additional page names from a file (one per line)
+
+Related rows:
+  --related    Treat the query as a row name (e.g. "Glassmorphism") or row id and list the
+               most similar rows of the domain (TF-IDF cosine, computed on demand)
+
+Autocomplete:
+  --complete   Treat the query as a prefix; print "text<TAB>document frequency<TAB>kind"
+               completions from the domain vocabulary and row names (-n sets how many)
+
+Shared indexes:
+  --build-index  Compile every CSV into index artifacts under $UI_UX_PRO_MAX_INDEX_DIR
+                 (default: <user cache dir>/indexes). Artifacts are named by CSV content,
+                 so every skill copy with the same data reuses them. Set
+                 UI_UX_PRO_MAX_DATA_DIR to point all copies at one data folder.
+
+Materialized design systems:
+  --materialize  Generate the design system of every product type (plain, "dark", "minimal")
+                 into a compressed artifact in the shared index dir; --design-system then
+                 serves those queries without searching. Prints drift vs the previous artifact.
+
+Persistent server:
+  --serve      Speak newline-delimited JSON-RPC (MCP stdio transport) on stdin/stdout and expose
+               search, search_stack, generate_design_system and persist_design_system as tools,
+               keeping indexes loaded for the whole session (same as: python server.py)
+
+Bulk generation:
+  --manifest   JSON/YAML list of {query, project_name, pages, output_dir}; generates and
+               persists every project over a process pool and prints a timing report
 """
 
 import argparse
 import sys
 import io
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+from core import (CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, MAX_EDITS, INDEX_DIR_ENV, COMPACT_FORMATS, search,
+                  search_stack, build_indexes, complete, related, index_dir, encode_compact)
+from design_system import (generate_design_system, generate_design_system_dict, persist_design_system, generate_from_manifest,
+                           format_manifest_report, materialize_design_systems, format_materialize_report,
+                           normalize_pages, page_slug, read_pages_file)
 
 # Force UTF-8 for stdout/stderr to handle emojis on Windows (cp1252 default)
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
@@ -27,11 +70,105 @@ if sys.stderr.encoding and sys.stderr.encoding.lower() != 'utf-8':
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 
-def format_output(result):
-    """Format results for Claude consumption (token-optimized)"""
+# --budget: columns dropped first when output must shrink, per domain (least useful first).
+# Columns not listed are never dropped; long values are trimmed instead.
+_GUIDELINE_DROP = ["Code Example Bad", "Code Example Good", "Platform", "Category", "Description"]
+BUDGET_DROP_ORDER = {
+    "style": ["Design System Variables", "Implementation Checklist", "CSS/Technical Keywords", "AI Prompt Keywords",
+              "Framework Compatibility", "Performance", "Accessibility", "Complexity", "Effects & Animation", "Keywords", "Type"],
+    "color": ["Notes"],
+    "chart": ["Accessibility Notes", "Color Guidance", "Interactive Level", "Secondary Options", "Keywords"],
+    "landing": ["Keywords", "Conversion Optimization", "Color Strategy"],
+    "product": ["Keywords", "Dashboard Style (if applicable)", "Secondary Styles"],
+    "ux": _GUIDELINE_DROP,
+    "react": _GUIDELINE_DROP,
+    "web": _GUIDELINE_DROP,
+    "typography": ["Tailwind Config", "CSS Import", "Notes", "Google Fonts URL", "Mood/Style Keywords", "Category"],
+    "icons": ["Import Code", "Style", "Keywords", "Library", "Category"],
+    "stack": ["Code Bad", "Docs URL", "Code Good", "Category", "Description"]
+}
+FIELD_CAPS = (300, 160, 80, 40)  # Per-field character limits, tried in order under --budget
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count for English/markdown text (~4 characters per token)"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _field_line(key, value, cap):
+    value_str = str(value)
+    if len(value_str) > cap:
+        value_str = value_str[:cap] + "..."
+    return f"- **{key}:** {value_str}"
+
+
+def plan_output(result, budget, header_chars=0):
+    """
+    Choose what format_output renders so it fits in about `budget` tokens.
+
+    Works from field lengths alone, before any text is built: drops columns in
+    the domain's BUDGET_DROP_ORDER, then tightens the per-field cap, then drops
+    trailing results (keeping at least one).
+
+    Returns:
+        (number of results, columns to keep, per-field cap, dropped columns)
+    """
+    rows = result.get("results", [])
+    columns = list(rows[0].keys()) if rows else []
+    drop_order = [col for col in BUDGET_DROP_ORDER.get(result.get("domain"), []) if col in columns]
+    limit = budget * CHARS_PER_TOKEN - header_chars
+
+    def cost(count, keep, cap):
+        total = 0
+        for i, row in enumerate(rows[:count], 1):
+            total += len(f"### Result {i}") + 2  # Heading plus blank line
+            for col in keep:
+                if col in row:
+                    value_len = len(str(row[col]))
+                    total += len(col) + 8 + min(value_len, cap) + (3 if value_len > cap else 0)
+        return total
+
+    keep = columns
+    dropped = []
+    for col in [None] + drop_order:
+        if col is not None:
+            dropped.append(col)
+            keep = [c for c in keep if c != col]
+        if cost(len(rows), keep, FIELD_CAPS[0]) <= limit:
+            return len(rows), keep, FIELD_CAPS[0], dropped
+    for cap in FIELD_CAPS[1:]:
+        if cost(len(rows), keep, cap) <= limit:
+            return len(rows), keep, cap, dropped
+    count = len(rows)
+    while count > 1 and cost(count, keep, FIELD_CAPS[-1]) > limit:
+        count -= 1
+    return count, keep, FIELD_CAPS[-1], dropped
+
+
+def format_output(result, budget=None):
+    """Format results for Claude consumption (token-optimized).
+
+    budget, if given, is a target size in tokens: columns are selected and
+    trimmed up front (see plan_output) instead of rendering everything. The
+    plan is an estimate, so if the rendered text still exceeds the budget it
+    is planned again against a smaller one until it fits (or nothing is left
+    to drop).
+    """
     if "error" in result:
         return f"Error: {result['error']}"
+    if budget is None:
+        return _render_output(result)
+    text = _render_output(result, budget)
+    target = budget
+    while estimate_tokens(text) > budget and target > 0:
+        target = min(target - (estimate_tokens(text) - budget), target * 9 // 10)
+        text = _render_output(result, budget, target)
+    return text
 
+
+def _render_output(result, budget=None, plan_budget=None):
+    """Render a result as markdown, planned against plan_budget (default: budget) tokens"""
     output = []
     if result.get("stack"):
         output.append(f"## UI Pro Max Stack Guidelines")
@@ -39,76 +176,211 @@ def format_output(result):
     else:
         output.append(f"## UI Pro Max Search Results")
         output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
+    if result.get("filters"):
+        applied = "; ".join(f"{col} = {' | '.join([values] if isinstance(values, str) else values)}"
+                            for col, values in result["filters"].items())
+        output.append(f"**Filters:** {applied}")
+    if result.get("corrections"):
+        fixes = ", ".join(f"{wrong} → {right}" for wrong, right in result["corrections"].items())
+        output.append(f"**Corrected:** {fixes}")
+    if result.get("facets"):
+        output.append(f"**Matched:** {result['matched']} rows")
+        for col, counts in result["facets"].items():
+            output.append(f"**{col}:** " + ", ".join(f"{value or '(blank)'} ({n})" for value, n in counts.items()))
     output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
 
-    for i, row in enumerate(result['results'], 1):
+    footer = []
+    if result.get("next_cursor"):
+        footer.append(f"**Next page:** --cursor {result['next_cursor']}")
+
+    rows = result['results']
+    keep, cap = None, FIELD_CAPS[0]
+    if budget is not None:
+        fixed = sum(len(line) + 1 for line in output + footer) + 80  # Room for the budget note
+        count, keep, cap, dropped = plan_output(result, budget if plan_budget is None else plan_budget, fixed)
+        rows = rows[:count]
+        note = f"**Budget:** ~{budget} tokens"
+        if dropped:
+            note += f" | omitted: {', '.join(dropped)}"
+        if count < result['count']:
+            note += f" | showing {count} of {result['count']}"
+        output.insert(-1, note)
+        if count < len(result['results']) and footer:
+            # The cursor resumes after the last fetched row, so it would skip the rows dropped here
+            footer = [f"**Next page:** none at this budget (results {count + 1}-{len(result['results'])} were dropped); "
+                      f"raise --budget or lower -n to page with --cursor"]
+
+    for i, row in enumerate(rows, 1):
         output.append(f"### Result {i}")
         for key, value in row.items():
-            value_str = str(value)
-            if len(value_str) > 300:
-                value_str = value_str[:300] + "..."
-            output.append(f"- **{key}:** {value_str}")
+            if keep is None or key in keep:
+                output.append(_field_line(key, value, cap))
         output.append("")
+    output.extend(footer)
 
     return "\n".join(output)
 
 
+def print_compact(result, fmt):
+    """Write a result in a compact machine format (see core.encode_compact) to stdout"""
+    try:
+        payload = encode_compact(result, fmt)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if isinstance(payload, bytes):
+        sys.stdout.flush()
+        sys.stdout.buffer.write(payload)
+        sys.stdout.buffer.flush()
+    else:
+        print(payload)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("--max-edits", type=int, default=MAX_EDITS, help=f"Typo tolerance: max edits when correcting unknown words, 0 disables (default: {MAX_EDITS})")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--compact", choices=COMPACT_FORMATS, default=None, help="Compact machine output: columnar JSON, TSV or MessagePack (needs msgpack)")
+    parser.add_argument("--budget", type=int, default=None, metavar="TOKENS", help="Fit search output into about this many tokens, dropping low-priority columns first")
+    parser.add_argument("--cursor", type=str, default=None, help="Resume after a previous page: pass the next_cursor it returned (same query, domain and filters)")
+    parser.add_argument("--facets", nargs="*", default=None, metavar="COLUMN", help="Also count matches per value of these categorical columns (all filterable columns if none given)")
+    parser.add_argument("--filter", action="append", default=[], metavar="COLUMN=VALUE", help="Only return rows whose categorical column has this value (repeatable; e.g. --filter Severity=High)")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
-    parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
+    parser.add_argument("--format", "-f", choices=["ascii", "markdown", "json"], default="ascii", help="Output format for design system (json: raw structure)")
+    parser.add_argument("--no-cache", action="store_true", help="Regenerate the design system instead of using the on-disk result cache")
     # Persistence (Master + Overrides pattern)
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
-    parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
+    parser.add_argument("--page", type=str, nargs="+", default=None, help="Create page-specific override files in design-system/pages/ (accepts several pages)")
+    parser.add_argument("--pages-file", type=str, default=None, help="File listing page names (one per line) to create override files for")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    # Bulk generation from a project manifest
+    parser.add_argument("--manifest", type=str, default=None, help="Generate and persist design systems for every project in a JSON/YAML manifest")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --manifest (default: CPU count)")
+    # Related rows
+    parser.add_argument("--related", action="store_true", help="Treat the query as a row name (or row id) and list the most similar rows in the domain")
+    # Autocomplete
+    parser.add_argument("--complete", action="store_true", help="Treat the query as a prefix and list completions from the domain vocabulary (default domain: style)")
+    # Materialized design systems
+    parser.add_argument("--materialize", action="store_true", help="Pre-generate design systems for every product type (and common modifiers) and report drift vs the previous run")
+    # Persistent stdio server
+    parser.add_argument("--serve", action="store_true", help="Run the MCP-style stdio JSON-RPC server (search, search_stack, generate_design_system, persist_design_system) with warm indexes")
+    # Shared compiled indexes
+    parser.add_argument("--build-index", action="store_true", help=f"Compile index artifacts for all domains and stacks into the shared index dir (${INDEX_DIR_ENV})")
 
     args = parser.parse_args()
+    if args.serve:
+        from server import serve
+        serve()
+        sys.exit(0)
+    if args.build_index:
+        artifacts = build_indexes()
+        print(f"Built {len(artifacts)} index artifacts in {index_dir()}")
+        sys.exit(0)
+    if args.materialize:
+        report = materialize_design_systems()
+        if args.json:
+            import json
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            print(format_materialize_report(report))
+        sys.exit(0)
+    if not args.query and not args.manifest:
+        parser.error("the query argument is required")
+    filters = {}
+    for item in args.filter:
+        column, sep, value = item.partition("=")
+        if not sep or not column.strip():
+            parser.error(f"--filter expects COLUMN=VALUE, got {item!r}")
+        filters.setdefault(column.strip(), []).append(value.strip())
+    facets = True if args.facets == [] else args.facets
 
+    # Manifest mode handles its own persistence
+    if args.manifest:
+        try:
+            summary = generate_from_manifest(args.manifest, args.workers)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if args.json:
+            import json
+            print(json.dumps(summary, indent=2, ensure_ascii=False))
+        else:
+            print(format_manifest_report(summary))
+        sys.exit(1 if summary["failed"] else 0)
+    # Related rows
+    elif args.related:
+        result = related(args.domain or "style", args.query, args.max_results)
+        if args.compact:
+            print_compact(result, args.compact)
+        elif args.json:
+            import json
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        else:
+            print(format_output(result, args.budget))
+    # Prefix completion
+    elif args.complete:
+        completions = complete(args.query, args.domain or "style", args.max_results)
+        if args.json:
+            import json
+            print(json.dumps(completions, indent=2, ensure_ascii=False))
+        else:
+            for item in completions:
+                print(f"{item['text']}\t{item['df']}\t{item['kind']}")
     # Design system takes priority
-    if args.design_system:
+    elif args.design_system and args.compact:
+        pages = normalize_pages((args.page or []) + (read_pages_file(args.pages_file) if args.pages_file else []))
+        design_system = generate_design_system_dict(args.query, args.project_name, args.persist, pages,
+                                                    args.output_dir, use_cache=not args.no_cache)
+        print_compact(design_system, args.compact)
+    elif args.design_system:
+        pages = normalize_pages((args.page or []) + (read_pages_file(args.pages_file) if args.pages_file else []))
+        output_format = "json" if args.json else args.format
         result = generate_design_system(
             args.query, 
             args.project_name, 
-            args.format,
+            output_format,
             persist=args.persist,
-            page=args.page,
-            output_dir=args.output_dir
+            page=pages,
+            output_dir=args.output_dir,
+            use_cache=not args.no_cache
         )
         print(result)
         
-        # Print persistence confirmation
-        if args.persist:
+        # Print persistence confirmation (kept out of JSON output so it stays parseable)
+        if args.persist and output_format != "json":
             project_slug = args.project_name.lower().replace(' ', '-') if args.project_name else "default"
             print("\n" + "=" * 60)
             print(f"✅ Design system persisted to design-system/{project_slug}/")
             print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
-            if args.page:
-                page_filename = args.page.lower().replace(' ', '-')
-                print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
+            for page in pages:
+                print(f"   📄 design-system/{project_slug}/pages/{page_slug(page)}.md (Page Overrides)")
             print("")
             print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
             print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
             print("=" * 60)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
+        result = search_stack(args.query, args.stack, args.max_results, args.max_edits, filters, facets, args.cursor)
+        if args.compact:
+            print_compact(result, args.compact)
+        elif args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
-            print(format_output(result))
+            print(format_output(result, args.budget))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
+        result = search(args.query, args.domain, args.max_results, args.max_edits, filters, facets, args.cursor)
+        if args.compact:
+            print_compact(result, args.compact)
+        elif args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
-            print(format_output(result))
+            print(format_output(result, args.budget))
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Server - MCP-style stdio JSON-RPC server
+
+Keeps the search indexes warm for a whole agent session: each workflow step
+(design system, domain searches, stack guidelines, persistence) is one
+message round trip instead of a new python process.
+
+Usage: python server.py            (or: python search.py --serve)
+
+Protocol: newline-delimited JSON-RPC 2.0 on stdin/stdout, as in the MCP stdio
+transport. Methods: initialize, ping, tools/list, tools/call. Tools: search,
+search_stack, generate_design_system, persist_design_system.
+"""
+
+import io
+import json
+import sys
+import threading
+import traceback
+
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, MAX_EDITS, search, search_stack, build_indexes
+from design_system import generate_design_system, generate_design_system_dict, persist_design_system, normalize_pages
+
+SERVER_NAME = "ui-ux-pro-max"
+SERVER_VERSION = "1.0.0"
+PROTOCOL_VERSION = "2024-11-05"
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+_FILTER_SCHEMA = {
+    "type": "object",
+    "description": "Categorical column -> value or list of values, e.g. {\"Severity\": \"High\"}",
+    "additionalProperties": {"anyOf": [{"type": "string"}, {"type": "array", "items": {"type": "string"}}]}
+}
+
+TOOLS = [
+    {
+        "name": "search",
+        "description": "BM25 search over one UI/UX domain (style, color, chart, landing, product, ux, typography, icons, react, web). Domain is auto-detected when omitted.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "domain": {"type": "string", "enum": list(CSV_CONFIG.keys())},
+                "max_results": {"type": "integer", "default": MAX_RESULTS},
+                "filters": _FILTER_SCHEMA,
+                "facets": {"type": "array", "items": {"type": "string"}, "description": "Columns to count matches by"},
+                "cursor": {"type": "string", "description": "next_cursor of the previous page"}
+            },
+            "required": ["query"]
+        }
+    },
+    {
+        "name": "search_stack",
+        "description": "Search implementation guidelines for one stack (default workflow stack: html-tailwind).",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "stack": {"type": "string", "enum": AVAILABLE_STACKS},
+                "max_results": {"type": "integer", "default": MAX_RESULTS},
+                "filters": _FILTER_SCHEMA,
+                "cursor": {"type": "string", "description": "next_cursor of the previous page"}
+            },
+            "required": ["query", "stack"]
+        }
+    },
+    {
+        "name": "generate_design_system",
+        "description": "Generate a complete design system (pattern, style, colors, typography, effects, anti-patterns) for a product query.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "project_name": {"type": "string"},
+                "format": {"type": "string", "enum": ["json", "markdown", "ascii"], "default": "json"}
+            },
+            "required": ["query"]
+        }
+    },
+    {
+        "name": "persist_design_system",
+        "description": "Generate a design system and save it as design-system/<project>/MASTER.md plus optional page override files.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "project_name": {"type": "string"},
+                "pages": {"type": "array", "items": {"type": "string"}},
+                "output_dir": {"type": "string", "description": "Defaults to the server's working directory"}
+            },
+            "required": ["query"]
+        }
+    }
+]
+
+
+class ToolError(Exception):
+    """Invalid tool call; reported to the client as an error result, not a protocol error"""
+
+
+def _required(args, name):
+    value = args.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise ToolError(f"'{name}' is required and must be a non-empty string")
+    return value
+
+
+def _optional_str(args, name):
+    value = args.get(name)
+    if value is not None and not isinstance(value, str):
+        raise ToolError(f"'{name}' must be a string")
+    return value
+
+
+def _choice(args, name, choices, required=False):
+    value = _required(args, name) if required else _optional_str(args, name)
+    if value is not None and value not in choices:
+        raise ToolError(f"Unknown {name}: {value}. Use one of: {', '.join(choices)}")
+    return value
+
+
+def _max_results(args):
+    value = args.get("max_results", MAX_RESULTS)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ToolError("'max_results' must be a positive integer")
+    return value
+
+
+def _string_list(args, name):
+    value = args.get(name)
+    if value is not None and (not isinstance(value, list) or not all(isinstance(v, str) for v in value)):
+        raise ToolError(f"'{name}' must be an array of strings")
+    return value
+
+
+def _filters(args):
+    value = args.get("filters")
+    if value is None:
+        return None
+    if not isinstance(value, dict) or not all(
+            isinstance(v, str) or (isinstance(v, list) and all(isinstance(item, str) for item in v))
+            for v in value.values()):
+        raise ToolError("'filters' must be an object mapping column names to a string or an array of strings")
+    return value
+
+
+def _call_search(args):
+    return search(_required(args, "query"), _choice(args, "domain", list(CSV_CONFIG)), _max_results(args), MAX_EDITS,
+                  _filters(args), _string_list(args, "facets"), _optional_str(args, "cursor"))
+
+
+def _call_search_stack(args):
+    return search_stack(_required(args, "query"), _choice(args, "stack", AVAILABLE_STACKS, required=True),
+                        _max_results(args), MAX_EDITS, _filters(args), None, _optional_str(args, "cursor"))
+
+
+def _call_generate_design_system(args):
+    query = _required(args, "query")
+    project_name = _optional_str(args, "project_name")
+    output_format = _choice(args, "format", ["json", "markdown", "ascii"]) or "json"
+    if output_format == "json":
+        return generate_design_system_dict(query, project_name)
+    return generate_design_system(query, project_name, output_format)
+
+
+def _call_persist_design_system(args):
+    query = _required(args, "query")
+    design_system = generate_design_system_dict(query, _optional_str(args, "project_name"))
+    return persist_design_system(design_system, normalize_pages(_string_list(args, "pages") or []),
+                                 _optional_str(args, "output_dir"), query)
+
+
+TOOL_HANDLERS = {
+    "search": _call_search,
+    "search_stack": _call_search_stack,
+    "generate_design_system": _call_generate_design_system,
+    "persist_design_system": _call_persist_design_system,
+}
+
+
+def call_tool(name, args):
+    """Run a tool; returns an MCP tools/call result ({"content": [...], "isError": bool})"""
+    handler = TOOL_HANDLERS.get(name)
+    if handler is None:
+        raise LookupError(f"Unknown tool: {name}")
+    try:
+        if args is not None and not isinstance(args, dict):
+            raise ToolError("'arguments' must be an object")
+        value = handler(args or {})
+    except (ToolError, ValueError, TypeError, OSError) as e:
+        return {"content": [{"type": "text", "text": f"Error: {e}"}], "isError": True}
+    is_error = isinstance(value, dict) and "error" in value
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return {"content": [{"type": "text", "text": text}], "isError": is_error}
+
+
+def handle_message(message):
+    """Response dict for one JSON-RPC message, or None for notifications"""
+    if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+        return _error(message.get("id") if isinstance(message, dict) else None, INVALID_REQUEST, "Invalid Request")
+    msg_id = message.get("id")
+    method = message["method"]
+    params = message.get("params") or {}
+    if "id" not in message:
+        return None  # Notification (e.g. notifications/initialized): no response
+
+    if method == "initialize":
+        # Warm every index in the background so the first tool call is already fast
+        threading.Thread(target=build_indexes, daemon=True).start()
+        return _result(msg_id, {
+            "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+            "capabilities": {"tools": {}},
+            "serverInfo": {"name": SERVER_NAME, "version": SERVER_VERSION}
+        })
+    if method == "ping":
+        return _result(msg_id, {})
+    if method == "tools/list":
+        return _result(msg_id, {"tools": TOOLS})
+    if method == "tools/call":
+        try:
+            return _result(msg_id, call_tool(params.get("name"), params.get("arguments")))
+        except LookupError as e:
+            return _error(msg_id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            return _error(msg_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+    return _error(msg_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+
+
+def _result(msg_id, result):
+    return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+
+def _error(msg_id, code, message):
+    return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message}}
+
+
+def _utf8(stream, **kwargs):
+    """stream itself if it is already UTF-8, else a UTF-8 wrapper over its buffer (e.g. on a cp1252 console)"""
+    if stream.encoding and stream.encoding.lower().replace("-", "") == "utf8":
+        return stream
+    return io.TextIOWrapper(stream.buffer, encoding="utf-8", **kwargs)
+
+
+def serve(stdin=None, stdout=None):
+    """Serve newline-delimited JSON-RPC requests until stdin closes"""
+    # Messages are UTF-8 JSON whatever the console code page
+    stdin = stdin or _utf8(sys.stdin)
+    stdout = stdout or _utf8(sys.stdout, newline="\n")
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            response = _error(None, PARSE_ERROR, "Parse error")
+        else:
+            response = handle_message(message)
+        if response is not None:
+            stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+            stdout.flush()
+
+
+if __name__ == "__main__":
+    serve()
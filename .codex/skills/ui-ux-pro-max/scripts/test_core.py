@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for core.py
+Usage: python -m unittest test_core   (from the scripts folder)
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import core
+from core import BM25, CSV_CONFIG, STACK_CONFIG, DATA_DIR, INDEX_DIR_ENV
+
+_INDEX_DIR = tempfile.TemporaryDirectory()
+_SAVED_ENV = {}
+
+
+def setUpModule():
+    # Keep index artifacts written by the tests out of the user's cache
+    _SAVED_ENV[INDEX_DIR_ENV] = os.environ.get(INDEX_DIR_ENV)
+    os.environ[INDEX_DIR_ENV] = _INDEX_DIR.name
+
+
+def tearDownModule():
+    if _SAVED_ENV[INDEX_DIR_ENV] is None:
+        os.environ.pop(INDEX_DIR_ENV, None)
+    else:
+        os.environ[INDEX_DIR_ENV] = _SAVED_ENV[INDEX_DIR_ENV]
+    _INDEX_DIR.cleanup()
+
+
+def exhaustive_top(bm25, query, k, allowed=None):
+    """Reference result: score() order, zero scores and disallowed documents dropped"""
+    ranked = [(idx, score) for idx, score in bm25.score(query)
+              if score > 0 and (allowed is None or allowed >> idx & 1)]
+    return ranked[:k]
+
+
+def random_query(rnd, vocab, common):
+    words = rnd.sample(vocab, rnd.randint(1, min(4, len(vocab)))) + rnd.sample(common, rnd.randint(0, min(3, len(common))))
+    rnd.shuffle(words)
+    if rnd.random() < 0.3 and len(words) > 1:
+        return f'"{words[0]} {words[1]}" ' + " ".join(words[2:])
+    return " ".join(words)
+
+
+class TopKTest(unittest.TestCase):
+    """BM25.top_k (MaxScore pruning) returns exactly the exhaustive score() ranking"""
+
+    KS = (1, 3, 10, 1000)
+
+    def assert_matches_score(self, bm25, query, allowed=None):
+        for k in self.KS:
+            self.assertEqual(bm25.top_k(query, k, allowed), exhaustive_top(bm25, query, k, allowed),
+                             f"query={query!r} k={k}")
+
+    def shipped_stores(self):
+        stores = [core.get_row_store(domain) for domain in CSV_CONFIG]
+        stores += [core._get_row_store(DATA_DIR / config["file"], core._layout(core._STACK_COLS))
+                   for config in STACK_CONFIG.values()]
+        return [store for store in stores if store is not None]
+
+    def test_shipped_corpora(self):
+        rnd = random.Random(1)
+        for store in self.shipped_stores():
+            vocab = sorted(store.bm25.idf)
+            common = sorted(vocab, key=lambda term: -store.bm25.doc_freqs[term])[:30]
+            for _ in range(40):
+                self.assert_matches_score(store.bm25, random_query(rnd, vocab, common))
+
+    def test_shipped_corpora_filtered(self):
+        rnd = random.Random(2)
+        for store in self.shipped_stores():
+            vocab = sorted(store.bm25.idf)
+            common = sorted(vocab, key=lambda term: -store.bm25.doc_freqs[term])[:30]
+            for _ in range(10):
+                allowed = rnd.getrandbits(store.bm25.N)
+                self.assert_matches_score(store.bm25, random_query(rnd, vocab, common), allowed)
+
+    def test_synthetic_corpora(self):
+        # Small vocabularies make many tied scores, which top_k must order like score() (lower doc id first)
+        for seed in range(20):
+            rnd = random.Random(seed)
+            vocab = [f"w{i:03d}" for i in range(rnd.randint(3, 40))]
+            docs = [" ".join(rnd.choice(vocab) for _ in range(rnd.randint(0, 12))) for _ in range(rnd.randint(1, 300))]
+            for positions, quantize in ((False, None), (True, None), (True, 8), (False, 16)):
+                bm25 = BM25(positions=positions, quantize=quantize)
+                bm25.fit(docs)
+                if seed % 3 == 0:
+                    bm25.set_params(k1=1.2, b=0.5)
+                for _ in range(20):
+                    query = " ".join(rnd.choice(vocab) for _ in range(rnd.randint(1, 6)))
+                    if rnd.random() < 0.3:
+                        query = f'"{query}"'
+                    self.assert_matches_score(bm25, query)
+                    # Sparse, medium and dense filters take the probe, intersect and lazy paths
+                    density = rnd.choice((0.02, 0.3, 0.9))
+                    allowed = sum(1 << idx for idx in range(bm25.N) if rnd.random() < density)
+                    self.assert_matches_score(bm25, query, allowed)
+
+    def test_empty(self):
+        bm25 = BM25()
+        bm25.fit([])
+        self.assertEqual(bm25.top_k("anything", 3), [])
+        bm25 = BM25()
+        bm25.fit(["alpha beta", "gamma"])
+        self.assertEqual(bm25.top_k("alpha", 0), [])
+        self.assertEqual(bm25.top_k("alpha", 3, allowed=0), [])
+        self.assertEqual(bm25.top_k("missing", 3), [])
+
+
+class ExactNameTest(unittest.TestCase):
+    """Exact row names take the fast path without hiding rows that share the name"""
+
+    def test_shared_name_returns_every_row(self):
+        store = core.get_row_store("ux")
+        ids = store.exact("font loading")
+        self.assertGreater(len(ids), 1)
+        result = core.search("Font Loading", "ux", len(ids))
+        self.assertTrue(result.get("fast_path"))
+        self.assertEqual(result["results"], [store.rows[idx] for idx in ids])
+        self.assertEqual([store.row_id(row) for row in result["results"]], list(ids))
+
+    def test_shared_name_larger_than_page_is_scored(self):
+        result = core.search("Font Loading", "ux", 1)
+        self.assertNotIn("fast_path", result)
+        self.assertIn("next_cursor", result)
+
+    def test_related_rejects_ambiguous_name(self):
+        self.assertIn("Ambiguous", core.related("ux", "Font Loading")["error"])
+        self.assertNotIn("error", core.related("style", "Glassmorphism"))
+
+
+class CursorTest(unittest.TestCase):
+    """Following next_cursor walks the score() ranking exactly once, whichever path served the first page"""
+
+    def pages(self, query, domain, size, filters=None):
+        result = core.search(query, domain, size, filters=filters)
+        pages = [result]
+        while "next_cursor" in result:
+            result = core.search(query, domain, size, filters=filters, cursor=result["next_cursor"])
+            self.assertNotIn("error", result)
+            pages.append(result)
+        return pages
+
+    def assert_pages_match_score(self, store, query, domain, size, filters=None):
+        allowed = store.filter_mask(filters) if filters else None
+        pages = self.pages(query, domain, size, filters)
+        ranked = [idx for idx, _ in exhaustive_top(store.bm25, query, store.bm25.N, allowed)]
+        if pages[0].get("fast_path"):
+            # The named rows come first, then the rest of the ranking without them
+            shown = [idx for idx in store.exact(query) if allowed is None or allowed >> idx & 1]
+            ranked = shown + [idx for idx in ranked if idx not in shown]
+        joined = [row for page in pages for row in page["results"]]
+        self.assertEqual(joined, [store.rows[idx] for idx in ranked], f"query={query!r} filters={filters} size={size}")
+        # Only a fast-path page may be short of a full page before the last one
+        self.assertTrue(all(page["count"] == size for page in pages[1:-1]))
+        if len(pages) > 1 and not pages[0].get("fast_path"):
+            self.assertEqual(pages[0]["count"], size)
+
+    def random_filters(self, rnd, store):
+        col = rnd.choice(sorted(store.bitmaps))
+        return {col: rnd.choice(sorted(store.bitmaps[col]))}
+
+    def test_scored_first_page(self):
+        rnd = random.Random(3)
+        for domain in CSV_CONFIG:
+            store = core.get_row_store(domain)
+            vocab = sorted(store.bm25.idf)
+            common = sorted(vocab, key=lambda term: -store.bm25.doc_freqs[term])[:30]
+            for i in range(6):
+                filters = self.random_filters(rnd, store) if i % 2 and store.bitmaps else None
+                self.assert_pages_match_score(store, random_query(rnd, vocab, common), domain, rnd.randint(1, 4), filters)
+
+    def test_fast_path_first_page(self):
+        rnd = random.Random(4)
+        for domain in CSV_CONFIG:
+            store = core.get_row_store(domain)
+            if not store.key_col:
+                continue
+            for i in range(6):
+                name = store.rows[rnd.randrange(len(store.rows))][store.key_col]
+                size = len(store.exact(name)) + rnd.randint(0, 2)
+                filters = self.random_filters(rnd, store) if i % 2 and store.bitmaps else None
+                if filters is None:
+                    self.assertTrue(core.search(name, domain, size).get("fast_path"), name)
+                self.assert_pages_match_score(store, name, domain, size, filters)
+
+
+class CorrectionTest(unittest.TestCase):
+    """Typos are corrected only in queries that match nothing as written"""
+
+    def test_known_words_keep_unknown_ones_uncorrected(self):
+        result = core.search("dating app", "landing", 3)
+        self.assertNotIn("corrections", result)
+        self.assertEqual(result["results"][0]["Pattern Name"], "App Store Style Landing")
+
+    def test_unmatched_query_is_corrected(self):
+        result = core.search("glasmorphism", "style", 3)
+        self.assertEqual(result["corrections"], {"glasmorphism": "glassmorphism"})
+        self.assertEqual(result["results"][0]["Style Category"], "Glassmorphism")
+
+
+class PruneTest(unittest.TestCase):
+    """Pruning the index dir only ever deletes stale files this skill wrote"""
+
+    def test_only_artifact_names_are_pruned(self):
+        folder = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, folder, True)
+        stale = time.time() - core.INDEX_MAX_AGE - 60
+        names = {
+            "0" * 32 + "-" + "1" * 16 + ".json": False,
+            "0" * 32 + "-" + "1" * 16 + ".pickle": False,
+            "product-joins-" + "2" * 32 + ".json": False,
+            "settings.json": True,
+            "notes.pickle": True,
+            "product-joins-latest.json": True,
+        }
+        for name in names:
+            (folder / name).write_text("{}", encoding="utf-8")
+            os.utime(folder / name, (stale, stale))
+        fresh = folder / ("3" * 32 + "-" + "4" * 16 + ".json")
+        fresh.write_text("{}", encoding="utf-8")
+
+        core.prune_index_dir(folder)
+        self.assertEqual({name: (folder / name).exists() for name in names}, names)
+        self.assertTrue(fresh.exists())
+
+
+class ReloadTest(unittest.TestCase):
+    """Searches keep working, and never wait on a rebuild, while the data changes underneath them"""
+
+    MARKER = "Zzreloadmarker"
+
+    def setUp(self):
+        self.data_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir, True)
+        shutil.copy(DATA_DIR / CSV_CONFIG["ux"]["file"], self.data_dir)
+        self.csv_path = self.data_dir / CSV_CONFIG["ux"]["file"]
+        self.original = self.csv_path.read_text(encoding="utf-8")
+        patcher = mock.patch.object(core, "DATA_DIR", self.data_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_version(self, with_marker):
+        # Atomic, as a real data update must be: readers never see a half-written CSV
+        extra = f"999,Animation,{self.MARKER},All,Marker row,Do,Don't,,,High\n" if with_marker else ""
+        core.atomic_write(self.csv_path, self.original.rstrip("\n") + "\n" + extra)
+
+    def marker_found(self):
+        return any(row["Issue"] == self.MARKER for row in core.search(self.MARKER, "ux", 3)["results"])
+
+    def test_changed_file_keeps_serving_current_store(self):
+        before = core.get_row_store("ux")
+        self.write_version(True)
+        self.assertIs(core.get_row_store("ux"), before)  # Rebuild happens off the calling thread
+        core.reload_indexes()
+        self.assertIsNot(core.get_row_store("ux"), before)
+        self.assertTrue(self.marker_found())
+
+    def test_version_describes_rows_served(self):
+        old = core.search(self.MARKER, "ux", 3)
+        self.write_version(True)
+        # Served by the old store until the rebuild is swapped in: the old version, and a cursor
+        # that the new store must refuse since it would resume inside another ranking
+        stale = core.search(self.MARKER, "ux", 3)
+        self.assertFalse(any(row["Issue"] == self.MARKER for row in stale["results"]))
+        self.assertEqual(stale["data_version"], old["data_version"])
+        cursor = core.search("animation", "ux", 1)["next_cursor"]
+        core.reload_indexes()
+
+        fresh = core.search(self.MARKER, "ux", 3)
+        self.assertTrue(any(row["Issue"] == self.MARKER for row in fresh["results"]))
+        self.assertEqual(fresh["data_version"], core.data_version())
+        self.assertNotEqual(fresh["data_version"], old["data_version"])
+        self.assertIn("stale", core.search("animation", "ux", 1, cursor=cursor)["error"])
+
+    def test_concurrent_searches_during_reloads(self):
+        core.search("animation", "ux", 3)
+        errors = []
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                try:
+                    result = core.search("animation keyboard", "ux", 3)
+                    if "error" in result or not result["results"]:
+                        errors.append(result)
+                    core.search(self.MARKER, "ux", 3, filters={"Severity": "High"})
+                except Exception as e:  # Any failure under reload is a bug
+                    errors.append(repr(e))
+
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in readers:
+            thread.start()
+        try:
+            for i in range(20):
+                self.write_version(i % 2 == 0)
+                core.reload_indexes()
+                time.sleep(0.005)
+        finally:
+            stop.set()
+            for thread in readers:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.write_version(True)
+        core.reload_indexes()
+        self.assertTrue(self.marker_found())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,66 +4,108 @@
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
+import base64
+import bisect
+import copy
 import csv
+import hashlib
+import heapq
+import json
+import os
 import re
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from array import array
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from collections import Counter, OrderedDict, defaultdict, namedtuple
 
 # ============ CONFIGURATION ============
-DATA_DIR = Path(__file__).parent.parent / "data"
+# Both skill copies (.codex/.gemini) can point at one data folder and one compiled index folder
+DATA_DIR = Path(os.environ.get("UI_UX_PRO_MAX_DATA_DIR") or Path(__file__).parent.parent / "data")
+INDEX_DIR_ENV = "UI_UX_PRO_MAX_INDEX_DIR"
+INDEX_FORMAT_VERSION = 13  # Bump whenever RowStore/BM25 gain or change fields
+INDEX_MAX_AGE = 30 * 24 * 3600  # Seconds since last use after which an index artifact is deleted
 MAX_RESULTS = 3
+MAX_EDITS = 2  # Edit-distance bound for correcting misspelled query words (0 disables)
+RELATED_K = 10  # Most rows related() returns
+NEIGHBOR_MAX_DF = 200  # Terms in more rows than this are ignored by related() (bounds the work per call)
+RANKED_CACHE_SIZE = 64  # Full ranked lists kept warm for cursor pagination
 
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type", "AI Prompt Keywords"],
-        "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity", "AI Prompt Keywords", "CSS/Technical Keywords", "Implementation Checklist", "Design System Variables"]
+        "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity", "AI Prompt Keywords", "CSS/Technical Keywords", "Implementation Checklist", "Design System Variables"],
+        "match_cols": ["Style Category", "Keywords"],
+        "key_col": "Style Category",
+        "filter_cols": ["Type", "Complexity"],
+        "positions": True
     },
     "color": {
         "file": "colors.csv",
         "search_cols": ["Product Type", "Notes"],
-        "output_cols": ["Product Type", "Primary (Hex)", "Secondary (Hex)", "CTA (Hex)", "Background (Hex)", "Text (Hex)", "Notes"]
+        "output_cols": ["Product Type", "Primary (Hex)", "Secondary (Hex)", "CTA (Hex)", "Background (Hex)", "Text (Hex)", "Notes"],
+        "key_col": "Product Type"
     },
     "chart": {
         "file": "charts.csv",
         "search_cols": ["Data Type", "Keywords", "Best Chart Type", "Accessibility Notes"],
-        "output_cols": ["Data Type", "Keywords", "Best Chart Type", "Secondary Options", "Color Guidance", "Accessibility Notes", "Library Recommendation", "Interactive Level"]
+        "output_cols": ["Data Type", "Keywords", "Best Chart Type", "Secondary Options", "Color Guidance", "Accessibility Notes", "Library Recommendation", "Interactive Level"],
+        "key_col": "Data Type"
     },
     "landing": {
         "file": "landing.csv",
         "search_cols": ["Pattern Name", "Keywords", "Conversion Optimization", "Section Order"],
-        "output_cols": ["Pattern Name", "Keywords", "Section Order", "Primary CTA Placement", "Color Strategy", "Conversion Optimization"]
+        "output_cols": ["Pattern Name", "Keywords", "Section Order", "Primary CTA Placement", "Color Strategy", "Conversion Optimization"],
+        "key_col": "Pattern Name"
     },
     "product": {
         "file": "products.csv",
         "search_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Key Considerations"],
-        "output_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Secondary Styles", "Landing Page Pattern", "Dashboard Style (if applicable)", "Color Palette Focus"]
+        "output_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Secondary Styles", "Landing Page Pattern", "Dashboard Style (if applicable)", "Color Palette Focus"],
+        "key_col": "Product Type"
     },
     "ux": {
         "file": "ux-guidelines.csv",
         "search_cols": ["Category", "Issue", "Description", "Platform"],
-        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
+        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"],
+        "key_col": "Issue",
+        "filter_cols": ["Category", "Platform", "Severity"],
+        "positions": True
     },
     "typography": {
         "file": "typography.csv",
         "search_cols": ["Font Pairing Name", "Category", "Mood/Style Keywords", "Best For", "Heading Font", "Body Font"],
-        "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"]
+        "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"],
+        "key_col": "Font Pairing Name",
+        "filter_cols": ["Category"]
     },
     "icons": {
         "file": "icons.csv",
         "search_cols": ["Category", "Icon Name", "Keywords", "Best For"],
-        "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"]
+        "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"],
+        "key_col": "Icon Name",
+        "filter_cols": ["Category", "Library", "Style"]
     },
     "react": {
         "file": "react-performance.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
-        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
+        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"],
+        "key_col": "Issue",
+        "filter_cols": ["Category", "Platform", "Severity"],
+        "positions": True
     },
     "web": {
         "file": "web-interface.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
-        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
+        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"],
+        "key_col": "Issue",
+        "filter_cols": ["Category", "Platform", "Severity"],
+        "positions": True
     }
 }
 
@@ -86,105 +128,1247 @@ STACK_CONFIG = {
 # Common columns for all stacks
 _STACK_COLS = {
     "search_cols": ["Category", "Guideline", "Description", "Do", "Don't"],
-    "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"]
+    "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"],
+    "filter_cols": ["Category", "Severity"],
+    "positions": True
 }
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
+# Everything that shapes a compiled RowStore besides the CSV content (part of the artifact name)
+IndexLayout = namedtuple("IndexLayout", ["search_cols", "output_cols", "key_col", "filter_cols", "match_cols",
+                                         "positions"], defaults=[None, (), (), False])
+
+
+def _layout(config):
+    """IndexLayout for a CSV_CONFIG entry or _STACK_COLS"""
+    return IndexLayout(tuple(config["search_cols"]), tuple(config["output_cols"]), config.get("key_col"),
+                       tuple(config.get("filter_cols", ())), tuple(config.get("match_cols", ())),
+                       config.get("positions", False))
+
+
+# ============ CACHE & FINGERPRINTS ============
+def user_cache_dir():
+    """Per-user cache directory (override with UI_UX_PRO_MAX_CACHE_DIR)"""
+    override = os.environ.get("UI_UX_PRO_MAX_CACHE_DIR")
+    if override:
+        return Path(override)
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "ui-ux-pro-max"
+
+
+_FINGERPRINTS = {}
+_FINGERPRINTS_LOCK = threading.Lock()
+
+# os.umask() can only be read by setting it, which is process-wide; do that once,
+# at import, rather than per write while other threads may be creating files
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def file_fingerprint(filepath):
+    """SHA-256 of a data file's content ("missing" if the file does not exist).
+
+    The file is hashed on first use; afterwards the digest is reused for as long
+    as the file's mtime and size are unchanged, so repeated calls cost one stat().
+    """
+    path = str(filepath)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return "missing"
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _FINGERPRINTS.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    with _FINGERPRINTS_LOCK:
+        _FINGERPRINTS[path] = (stamp, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def atomic_write(path, content, mode=None):
+    """Write text or bytes to a temp file next to path, then rename it over path"""
+    path = Path(path)
+    # mkstemp creates files as 0600; publish with the mode a plain open() would give
+    if mode is None:
+        mode = 0o666 & ~_UMASK
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        if isinstance(content, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8')
+        with f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+_DATA_FINGERPRINTS = {}  # data dir -> (dirs, dir stamps, csv paths, file stamps, file digests, digest)
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _data_dirs(data_dir):
+    """data_dir and every directory below it"""
+    dirs = [data_dir]
+    for current in dirs:
+        dirs.extend(Path(entry.path) for entry in os.scandir(current) if entry.is_dir())
+    return dirs
+
+
+def _combine_fingerprints(data_dir, paths, digests):
+    digest = hashlib.sha256()
+    for path, file_digest in zip(paths, digests):
+        digest.update(f"{path.relative_to(data_dir).as_posix()}:{file_digest}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def data_fingerprint(data_dir=None, pinned=None):
+    """Aggregate fingerprint of every CSV under DATA_DIR (relative path + content digest).
+
+    The CSV list is reused while no directory's mtime changes (adding, removing
+    or renaming a file updates its directory), and the digest while no file's
+    mtime/size changes, so repeated calls cost one stat() per directory and file.
+    pinned maps CSV paths (str) to the content digest to count them with
+    instead of the file's current one.
+    """
+    data_dir = Path(data_dir or DATA_DIR)
+    key = str(data_dir)
+    cached = _DATA_FINGERPRINTS.get(key)
+    try:
+        if cached is not None and [_stamp(d) for d in cached[0]] == cached[1]:
+            dirs, dir_stamps, paths = cached[:3]
+        else:
+            dirs = _data_dirs(data_dir)
+            dir_stamps = [_stamp(d) for d in dirs]
+            paths = sorted(data_dir.rglob("*.csv"))
+        file_stamps = [_stamp(path) for path in paths]
+    except FileNotFoundError:
+        # A file or directory vanished mid-scan: list again and do not cache the result
+        dirs, paths, file_stamps = None, sorted(data_dir.rglob("*.csv")), None
+    if cached is not None and cached[2] == paths and cached[3] == file_stamps:
+        digests, total = cached[4:]
+    else:
+        digests = [file_fingerprint(path) for path in paths]
+        total = _combine_fingerprints(data_dir, paths, digests)
+        if dirs is not None:
+            with _FINGERPRINTS_LOCK:
+                _DATA_FINGERPRINTS[key] = (dirs, dir_stamps, paths, file_stamps, digests, total)
+    if pinned:
+        pinned_digests = [pinned.get(str(path), file_digest) for path, file_digest in zip(paths, digests)]
+        if pinned_digests != digests:
+            return _combine_fingerprints(data_dir, paths, pinned_digests)
+    return total
+
+
+def data_version(stores=()):
+    """Short, human-readable form of data_fingerprint() included in results.
+
+    Pass the row stores a result was read from: their CSVs then count with the
+    content each store was built from, so while a changed file is rebuilt in the
+    background (see _get_row_store) the version still matches the rows served.
+    """
+    return data_fingerprint(pinned={store.filepath: store.fingerprint for store in stores})[:16]
+
 
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking algorithm for text search
+
+    With positions=True the index also keeps token positions per (term, document),
+    which lets score() rank quoted phrases ("dark mode") and boost documents where
+    consecutive query terms appear close together, using only the postings.
+
+    finalize() precomputes every posting's BM25 impact (its full contribution to
+    the document score), so queries only accumulate stored numbers. quantize=8 or
+    16 stores impacts as unsigned ints with one scale factor per index; call
+    set_params() to change k1/b and recompute the impacts.
+
+    Once finalized the index is read-only: every structure is a plain dict or
+    array and queries only read them (never index a missing key into a
+    defaultdict), so any number of threads may query it concurrently. To change
+    a shared index, build a new one (or with_params()) and swap the reference.
+    """
+
+    PHRASE_RE = re.compile(r'"([^"]+)"')
 
-    def __init__(self, k1=1.5, b=0.75):
+    def __init__(self, k1=1.5, b=0.75, positions=False, phrase_boost=1.0, proximity_boost=0.5, proximity_window=3,
+                 quantize=None):
+        if quantize not in (None, 8, 16):
+            raise ValueError("quantize must be None, 8 or 16")
         self.k1 = k1
         self.b = b
-        self.corpus = []
+        self.quantize = quantize
         self.doc_lengths = []
         self.avgdl = 0
         self.idf = {}
-        self.doc_freqs = defaultdict(int)
+        self.doc_freqs = {}
+        self.postings = {}  # term -> [(doc_id, tf), ...]
         self.N = 0
+        self.store_positions = positions
+        self.positions = {}  # term -> {doc_id: (pos, ...)}
+        self.phrase_boost = phrase_boost
+        self.proximity_boost = proximity_boost
+        self.proximity_window = proximity_window
+        self.trigrams = {}  # trigram -> (term, ...) over the vocabulary, built by finalize()
+        self.doc_ids = {}  # term -> array of doc ids, aligned with impacts
+        self.impacts = {}  # term -> array of per-posting BM25 impacts (quantized ints if quantize is set)
+        self.max_impact = {}  # term -> largest impact, the term's upper bound for top_k
+        self.impact_scale = None  # float value of one quantization step
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
         text = re.sub(r'[^\w\s]', ' ', str(text).lower())
         return [w for w in text.split() if len(w) > 2]
 
-    def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+    def add_document(self, doc):
+        """Index one document, keeping only its postings (and positions) and length"""
+        tokens = self.tokenize(doc)
+        doc_id = self.N
+        for word, tf in Counter(tokens).items():
+            self.postings.setdefault(word, []).append((doc_id, tf))
+            self.doc_freqs[word] = self.doc_freqs.get(word, 0) + 1
+        if self.store_positions:
+            term_positions = defaultdict(list)
+            for pos, word in enumerate(tokens):
+                term_positions[word].append(pos)
+            for word, pos_list in term_positions.items():
+                self.positions.setdefault(word, {})[doc_id] = tuple(pos_list)
+        self.doc_lengths.append(len(tokens))
+        self.N += 1
+
+    def finalize(self):
+        """Compute average document length and IDF once all documents are added"""
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
         self.avgdl = sum(self.doc_lengths) / self.N
-
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
-
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
+        self.doc_ids = {word: array('l', (idx for idx, _ in postings)) for word, postings in self.postings.items()}
+        self._compute_impacts()
+
+        trigrams = defaultdict(list)
+        for word in self.doc_freqs:
+            for gram in self._trigrams(word):
+                trigrams[gram].append(word)
+        self.trigrams = {gram: tuple(words) for gram, words in trigrams.items()}
+
+    def fit(self, documents):
+        """Build BM25 index from documents (any iterable, consumed in one pass)"""
+        for doc in documents:
+            self.add_document(doc)
+        self.finalize()
+
+    def to_state(self):
+        """JSON-serializable parameters, postings and positions; everything else is derived by finalize()"""
+        state = {
+            "k1": self.k1, "b": self.b, "quantize": self.quantize, "positions": self.store_positions,
+            "phrase_boost": self.phrase_boost, "proximity_boost": self.proximity_boost,
+            "proximity_window": self.proximity_window, "doc_lengths": self.doc_lengths,
+            "postings": self.postings
+        }
+        if self.store_positions:
+            # Aligned with postings: term -> [[pos, ...] per posting]
+            state["term_positions"] = {word: [self.positions[word][idx] for idx, _ in postings]
+                                       for word, postings in self.postings.items()}
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a finalized index from to_state() output"""
+        bm25 = cls(state["k1"], state["b"], state["positions"], state["phrase_boost"], state["proximity_boost"],
+                   state["proximity_window"], state["quantize"])
+        bm25.doc_lengths = list(state["doc_lengths"])
+        bm25.N = len(bm25.doc_lengths)
+        bm25.postings = {word: [(idx, tf) for idx, tf in postings] for word, postings in state["postings"].items()}
+        bm25.doc_freqs = {word: len(postings) for word, postings in bm25.postings.items()}
+        if bm25.store_positions:
+            bm25.positions = {
+                word: {idx: tuple(pos) for (idx, _), pos in zip(bm25.postings[word], term_positions)}
+                for word, term_positions in state["term_positions"].items()
+            }
+        bm25.finalize()
+        return bm25
+
+    def _term_score(self, idf, tf, doc_len):
+        """BM25 contribution of one query term to one document"""
+        numerator = tf * (self.k1 + 1)
+        denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
+        return idf * numerator / denominator
+
+    def _compute_impacts(self):
+        """Precompute each posting's contribution for the current k1/b (not atomic: unshared indexes only)"""
+        impacts = {}
+        for word, postings in self.postings.items():
+            idf = self.idf[word]
+            impacts[word] = [self._term_score(idf, tf, self.doc_lengths[idx]) for idx, tf in postings]
+        self.max_impact = {word: max(values) for word, values in impacts.items()}
+
+        if self.quantize is None:
+            self.impact_scale = None
+            self.impacts = {word: array('d', values) for word, values in impacts.items()}
+            return
+        levels = (1 << self.quantize) - 1
+        self.impact_scale = (max(self.max_impact.values(), default=0) / levels) or 1.0
+        typecode = 'B' if self.quantize == 8 else 'H'
+        self.impacts = {
+            word: array(typecode, (max(1, round(v / self.impact_scale)) for v in values))
+            for word, values in impacts.items()
+        }
+        self.max_impact = {word: max(values) * self.impact_scale for word, values in self.impacts.items()}
+
+    def set_params(self, k1=None, b=None):
+        """Change k1 and/or b and recompute the stored impacts, in place (use with_params() on shared indexes)"""
+        if k1 is not None:
+            self.k1 = k1
+        if b is not None:
+            self.b = b
+        if self.N:
+            self._compute_impacts()
+
+    def with_params(self, k1=None, b=None):
+        """Copy of this index with new k1/b; postings are shared, impacts rebuilt, self is left untouched"""
+        clone = copy.copy(self)
+        clone.set_params(k1, b)
+        return clone
+
+    def term_impacts(self, term):
+        """(doc ids, float impacts) of a term's postings"""
+        values = self.impacts.get(term, ())
+        if self.impact_scale is not None:
+            values = [q * self.impact_scale for q in values]
+        return self.doc_ids.get(term, ()), values
+
     def score(self, query):
         """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+        scores = [0] * self.N
+        for idx, total in self.accumulate(query).items():
+            scores[idx] = total
+        return sorted(enumerate(scores), key=lambda x: x[1], reverse=True)
+
+    def accumulate(self, query, allowed=None):
+        """Exhaustive term-at-a-time scores {doc: score} of every document the query touches.
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+        allowed is an optional document bitmap, as in top_k.
+        """
+        mask = None if allowed is None else self._mask_bytes(allowed)
+        scores = {}
+        for token in self.tokenize(query):
+            if token not in self.idf:
+                continue
+            doc_ids, impacts = self.term_impacts(token)
+            for idx, impact in zip(doc_ids, impacts):
+                if mask is None or mask[idx >> 3] >> (idx & 7) & 1:
+                    scores[idx] = scores.get(idx, 0) + impact
 
+        if self.store_positions:
+            for idx, bonus in self.positional_bonus(query).items():
+                if mask is None or mask[idx >> 3] >> (idx & 7) & 1:
+                    scores[idx] = scores.get(idx, 0) + bonus
+        return scores
+
+    def _mask_bytes(self, allowed):
+        """Bitmap as little-endian bytes, so testing one document is an index and a shift"""
+        return allowed.to_bytes((self.N + 7) // 8, "little")
+
+    def top_k(self, query, k, allowed=None):
+        """Top k (doc, score) pairs with score > 0, using MaxScore dynamic pruning.
+
+        Returns exactly what score(query)[:k] would (minus zero scores), including
+        tie order (lower doc id first), but only fully scores documents that can
+        still enter the current top k. Each query term (and the positional bonus,
+        treated as one more term) carries an upper bound on its contribution;
+        terms whose bounds together cannot beat the k-th best score are
+        "non-essential", so documents matching only those are never visited.
+
+        allowed is an optional bitmap (int, bit i = doc i) of the only documents
+        that may be returned. Membership is tested on a byte copy of the bitmap.
+        Each term's postings are narrowed to it by binary search per allowed
+        document when the filter is far smaller than the list, by one pass when
+        the list is short; the postings of common terms are left whole, and
+        disallowed documents are skipped only where the essential terms reach
+        them, so MaxScore still never walks a non-essential common term.
+        """
+        if k <= 0 or self.N == 0 or allowed == 0:
+            return []
+        query_tokens = [token for token in self.tokenize(query) if token in self.idf]
+        counts = Counter(query_tokens)
+
+        mask = allowed_ids = None
+        if allowed is not None:
+            mask = self._mask_bytes(allowed)
+            selected = bin(allowed).count("1")
+
+        # (upper bound, doc ids, contributions, term key, postings still unfiltered)
+        terms = []
+        for token, count in counts.items():
+            doc_ids, impacts = self.term_impacts(token)
+            unfiltered = False
+            if mask is not None and selected * 8 < len(doc_ids):
+                if allowed_ids is None:
+                    allowed_ids = [base + bit for base, byte in zip(range(0, self.N, 8), mask) if byte
+                                   for bit in range(8) if byte >> bit & 1]
+                doc_ids, impacts = self._probe(doc_ids, impacts, allowed_ids)
+            elif mask is not None and len(doc_ids) * 4 < self.N:
+                doc_ids, impacts = self._intersect(doc_ids, impacts, mask)
+            elif mask is not None:
+                unfiltered = True  # Common term: filter its postings only where the MaxScore loop reaches them
+            if not doc_ids:
+                continue
+            terms.append((count * self.max_impact[token], doc_ids, impacts, token, unfiltered))
+        if self.store_positions:
+            bonus = sorted(self.positional_bonus(query).items())
+            if mask is not None:
+                bonus = [(idx, v) for idx, v in bonus if mask[idx >> 3] >> (idx & 7) & 1]
+            if bonus:
+                terms.append((max(v for _, v in bonus), [idx for idx, _ in bonus], [v for _, v in bonus], None, False))
+        if not terms:
+            return []
+        terms.sort(key=lambda t: t[0])
+
+        bounds = [t[0] for t in terms]
+        prefix_bounds = []
+        total = 0
+        for bound in bounds:
+            total += bound
+            prefix_bounds.append(total)
+        doc_lists = [t[1] for t in terms]
+        unfiltered = [t[4] for t in terms]
+        cursors = [0] * len(terms)
+
+        eps = 1e-9
+        heap = []  # min-heap of (score, -doc): root is the current k-th best
+        threshold = 0
+        first_essential = 0
+        while True:
+            # Next candidate: smallest doc id among essential terms' cursors
+            doc = None
+            for i in range(first_essential, len(terms)):
+                if unfiltered[i]:
+                    # Skip the disallowed documents this cursor reaches
+                    docs, pos = doc_lists[i], cursors[i]
+                    while pos < len(docs) and not mask[docs[pos] >> 3] >> (docs[pos] & 7) & 1:
+                        pos += 1
+                    cursors[i] = pos
+                if cursors[i] < len(doc_lists[i]):
+                    candidate = doc_lists[i][cursors[i]]
+                    if doc is None or candidate < doc:
+                        doc = candidate
+            if doc is None:
+                break
+
+            contributions = {}
+            bound_so_far = 0
+            for i in range(first_essential, len(terms)):
+                if cursors[i] < len(doc_lists[i]) and doc_lists[i][cursors[i]] == doc:
+                    contributions[i] = terms[i][2][cursors[i]]
+                    bound_so_far += bounds[i]
+                    cursors[i] += 1
+
+            # Non-essential terms, highest bound first, stopping once the doc cannot make it
+            remaining = prefix_bounds[first_essential - 1] if first_essential else 0
+            pruned = False
+            for i in range(first_essential - 1, -1, -1):
+                if len(heap) == k and bound_so_far + remaining + eps < threshold:
+                    pruned = True
+                    break
+                remaining -= bounds[i]
+                pos = bisect.bisect_left(doc_lists[i], doc, cursors[i])
+                cursors[i] = pos
+                if pos < len(doc_lists[i]) and doc_lists[i][pos] == doc:
+                    contributions[i] = terms[i][2][pos]
+                    bound_so_far += bounds[i]
+            if pruned:
+                continue
+
+            # Exact score, summed in the same order as score() for identical floats
+            by_term = {terms[i][3]: c for i, c in contributions.items()}
+            total = 0
             for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+                if token in by_term:
+                    total += by_term[token]
+            if None in by_term:
+                total += by_term[None]
+            if total <= 0:
+                continue
+
+            entry = (total, -doc)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            else:
+                continue
+            if len(heap) == k:
+                threshold = heap[0][0]
+                while first_essential < len(terms) and prefix_bounds[first_essential] + eps < threshold:
+                    first_essential += 1
+
+        return [(-neg_doc, score) for score, neg_doc in sorted(heap, reverse=True)]
+
+    @staticmethod
+    def _intersect(doc_ids, impacts, mask):
+        """Postings restricted to the documents set in mask (see _mask_bytes)"""
+        kept = [i for i, idx in enumerate(doc_ids) if mask[idx >> 3] >> (idx & 7) & 1]
+        return [doc_ids[i] for i in kept], [impacts[i] for i in kept]
+
+    @staticmethod
+    def _probe(doc_ids, impacts, allowed_ids):
+        """Postings restricted to allowed_ids (sorted), by one binary search per allowed document"""
+        kept_ids, kept_impacts = [], []
+        lo = 0
+        for idx in allowed_ids:
+            lo = bisect.bisect_left(doc_ids, idx, lo)
+            if lo == len(doc_ids):
+                break
+            if doc_ids[lo] == idx:
+                kept_ids.append(idx)
+                kept_impacts.append(impacts[lo])
+        return kept_ids, kept_impacts
+
+    # ---- typo tolerance ----
+    @staticmethod
+    def _trigrams(word):
+        """Character trigrams of a word padded with boundary markers"""
+        padded = f"${word}$"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def correct(self, token, max_edits=2):
+        """Nearest vocabulary term to an unknown token, or None.
+
+        Candidates come from the trigram index; a term can only be within k edits
+        if it shares enough trigrams (each edit destroys at most 3), so only a
+        handful are checked with the bounded edit distance. Short tokens get a
+        tighter bound: none below 5 characters, 1 edit below 8.
+        """
+        if token in self.idf or token.isdigit():
+            return None
+        bound = 0 if len(token) < 5 else 1 if len(token) < 8 else max_edits
+        bound = min(bound, max_edits)
+        if bound <= 0:
+            return None
+
+        grams = self._trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            for word in self.trigrams.get(gram, ()):
+                shared[word] += 1
+
+        min_shared = len(grams) - 3 * bound
+        best = None
+        for word, count in shared.most_common():
+            if count < min_shared:
+                break
+            if abs(len(word) - len(token)) > bound:
+                continue
+            distance = self._edit_distance(token, word, bound)
+            if distance <= bound:
+                rank = (distance, -self.doc_freqs[word], word)
+                if best is None or rank < best:
+                    best = rank
+        return best[2] if best else None
+
+    @staticmethod
+    def _edit_distance(a, b, limit):
+        """Optimal string alignment distance, returning limit + 1 once it is exceeded"""
+        prev_prev = None
+        prev = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            cur = [i] + [0] * len(b)
+            for j in range(1, len(b) + 1):
+                cost = 0 if a[i - 1] == b[j - 1] else 1
+                cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+                if prev_prev is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                    cur[j] = min(cur[j], prev_prev[j - 2] + 1)
+            if min(cur) > limit:
+                return limit + 1
+            prev_prev, prev = prev, cur
+        return prev[-1]
+
+    def correct_query(self, query, max_edits=2):
+        """Rewrite unknown query words to their nearest vocabulary terms.
+
+        Only a query that matches nothing is rewritten: a word missing from one
+        domain's vocabulary is usually spelled right ("dating" in landing), and
+        replacing it would outrank the rows the rest of the query matches.
+        Returns (query, {original: correction}); quoting and word order are kept.
+        """
+        corrections = {}
+        tokens = set(self.tokenize(query))
+        if max_edits <= 0 or any(token in self.idf for token in tokens):
+            return query, corrections
+        for token in tokens:
+            fixed = self.correct(token, max_edits)
+            if fixed:
+                corrections[token] = fixed
+        if not corrections:
+            return query, corrections
+        corrected = re.sub(r'\w+', lambda m: corrections.get(m.group(0).lower(), m.group(0)), query)
+        return corrected, corrections
+
+    # ---- positional scoring ----
+    def positional_bonus(self, query):
+        """Phrase and proximity bonuses per document, from positional postings only (proximity_boost=0 disables the latter)"""
+        bonus = defaultdict(float)
+
+        # Quoted phrases: documents containing the exact token sequence
+        for phrase in self.PHRASE_RE.findall(query):
+            terms = self.tokenize(phrase)
+            if len(terms) < 2 or any(term not in self.idf for term in terms):
+                continue
+            weight = self.phrase_boost * sum(self.idf[term] for term in terms)
+            for idx in self.phrase_docs(terms):
+                bonus[idx] += weight
 
-            scores.append((idx, score))
+        # Proximity: consecutive query terms appearing within the window, in order
+        terms = [term for term in self.tokenize(query) if term in self.idf] if self.proximity_boost else []
+        for first, second in zip(terms, terms[1:]):
+            if first == second:
+                continue
+            first_docs = self.positions.get(first, {})
+            second_docs = self.positions.get(second, {})
+            if len(second_docs) < len(first_docs):
+                candidates = [idx for idx in second_docs if idx in first_docs]
+            else:
+                candidates = [idx for idx in first_docs if idx in second_docs]
+            weight = self.proximity_boost * (self.idf[first] + self.idf[second])
+            for idx in candidates:
+                distance = self._min_gap(first_docs[idx], second_docs[idx])
+                if distance <= self.proximity_window:
+                    bonus[idx] += weight / distance
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+        return bonus
+
+    def phrase_docs(self, terms):
+        """Documents in which terms occur consecutively (intersection of positional postings)"""
+        postings = [self.positions.get(term, {}) for term in terms]
+        rarest = min(postings, key=len)
+        matches = []
+        for idx in rarest:
+            if not all(idx in p for p in postings):
+                continue
+            starts = set(postings[0][idx])
+            for offset, p in enumerate(postings[1:], 1):
+                starts &= {pos - offset for pos in p[idx]}
+                if not starts:
+                    break
+            if starts:
+                matches.append(idx)
+        return matches
+
+    @staticmethod
+    def _min_gap(first_positions, second_positions):
+        """Smallest forward distance from an occurrence of the first term to one of the second"""
+        best = float("inf")
+        j = 0
+        for pos in first_positions:
+            while j < len(second_positions) and second_positions[j] <= pos:
+                j += 1
+            if j == len(second_positions):
+                break
+            best = min(best, second_positions[j] - pos)
+        return best
 
 
 # ============ SEARCH FUNCTIONS ============
+def _iter_csv(filepath):
+    """Stream CSV rows as dicts without loading the whole file"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
 def _load_csv(filepath):
     """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+    return list(_iter_csv(filepath))
+
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize_key(text):
+    """Case- and punctuation-insensitive form of a row name ("Fintech/Crypto" -> "fintech crypto")"""
+    return " ".join(_WORD_RE.findall(str(text).lower()))
+
+
+def normalize_tokens(text):
+    """Lowercase word tokens of a field value, as a set for O(1) membership checks"""
+    return frozenset(_WORD_RE.findall(str(text).lower()))
+
+
+class Completer:
+    """Prefix completion over a domain's vocabulary and row names.
+
+    Entries are kept sorted by lowercase text, so a prefix maps to one contiguous
+    slice found by bisection. Very short prefixes match large slices, so their
+    top results are precomputed when the completer is built.
+    """
+
+    PRECOMPUTED_PREFIX_LEN = 2
+    PRECOMPUTED_TOP = 20
+
+    def __init__(self, doc_freqs, names):
+        entries = {}
+        for term, df in doc_freqs.items():
+            entries[term] = (term, df, "term")
+        for name, count in Counter(name for name in names if name).items():
+            key = name.lower()
+            df = max(count, entries[key][1]) if key in entries else count
+            entries[key] = (name, df, "name")
+
+        self.keys = sorted(entries)
+        self.entries = [entries[key] for key in self.keys]
+        short = defaultdict(list)
+        for key, entry in zip(self.keys, self.entries):
+            for n in range(1, min(self.PRECOMPUTED_PREFIX_LEN, len(key)) + 1):
+                short[key[:n]].append(entry)
+        self.short = {prefix: self._rank(items, self.PRECOMPUTED_TOP) for prefix, items in short.items()}
+
+    @staticmethod
+    def _rank(entries, k):
+        """Top k entries by document frequency, names before terms, then alphabetically"""
+        return heapq.nsmallest(k, entries, key=lambda e: (-e[1], e[2] != "name", e[0].lower()))
+
+    def complete(self, prefix, k=10):
+        """Return up to k (text, document frequency, kind) entries starting with prefix"""
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+        if len(prefix) <= self.PRECOMPUTED_PREFIX_LEN and k <= self.PRECOMPUTED_TOP:
+            return self.short.get(prefix, [])[:k]
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return self._rank(self.entries[lo:hi], k)
+
+
+def _bitmap(ids, size):
+    """Int bitmap (bit i = row i) of the given row ids, built in one pass over a byte buffer"""
+    buf = bytearray((size + 7) // 8)
+    for idx in ids:
+        buf[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(buf, "little")
+
+
+_NEIGHBOR_VECTORS = weakref.WeakKeyDictionary()  # RowStore -> neighbor vectors, built on first related() call
+_NEIGHBOR_LOCK = threading.Lock()
+
 
+class RowStore:
+    """Rows of one CSV file, indexed once at load time.
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
+    Holds the projected output rows and the BM25 index over the search columns.
+    Layouts with match_cols (the style store) also keep those fields and the
+    whole row lowercased, so callers can substring-match priorities against
+    rows without re-lowercasing them per query.
+
+    A store is fully built by its constructor and never modified afterwards, so
+    it is safe to share between threads. Reloads build a new store and publish
+    it with one assignment (see _get_row_store and reload_indexes); queries
+    already running keep the store they started with. Published stores carry
+    the filepath and content fingerprint they were built from, which can lag
+    the file on disk until a rebuild is swapped in.
+    """
+
+    def __init__(self, filepath, layout):
+        self.layout = layout
+        self.rows = []
+
+        def documents():
+            for row in _iter_csv(filepath):
+                self.rows.append({col: row[col] for col in layout.output_cols if col in row})
+                yield " ".join(str(row.get(col, "")) for col in layout.search_cols)
+
+        # Only quoted phrases get a positional bonus, so unquoted queries rank by plain BM25
+        self.bm25 = BM25(positions=layout.positions, proximity_boost=0)
+        self.bm25.fit(documents())
+        self._derive()
+
+    def to_state(self):
+        """JSON-serializable rows and BM25 index, the only parts of a store not derived from them"""
+        return {"version": INDEX_FORMAT_VERSION, "rows": self.rows, "bm25": self.bm25.to_state()}
+
+    @classmethod
+    def from_state(cls, layout, state):
+        """Rebuild a store from to_state() output; ValueError if it was written by another format version"""
+        if state.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError("index artifact format mismatch")
+        store = cls.__new__(cls)
+        store.layout = layout
+        store.rows = state["rows"]
+        store.bm25 = BM25.from_state(state["bm25"])
+        store._derive()
+        return store
+
+    def _derive(self):
+        """Build the lookup structures computed from rows and bm25"""
+        layout = self.layout
+
+        # Per row: ({match col: lowercase text}, whole row lowercased)
+        self.match_text = []
+        if layout.match_cols:
+            for row in self.rows:
+                self.match_text.append(({col: str(row.get(col, "")).lower() for col in layout.match_cols},
+                                        str(row).lower()))
+
+        filter_cols = layout.filter_cols
+        # Rows are identified by their key column (e.g. "Style Category"), else the first output column.
+        # by_key is the exact-name hash index: normalize_key(name) -> ids of the rows with that name
+        # (names are not unique, e.g. ux has two "Font Loading" rows).
+        self.key_col = layout.key_col or layout.output_cols[0]
+        by_key = defaultdict(list)
+        for idx, row in enumerate(self.rows):
+            by_key[normalize_key(row.get(self.key_col, ""))].append(idx)
+        self.by_key = {key: tuple(ids) for key, ids in by_key.items()}
+
+        # Categorical columns (e.g. "Severity"): normalized value -> bitmap of the rows holding it,
+        # plus each row's facet id (index into facet_values[col], the first spelling seen)
+        self.bitmaps = {}
+        self.facet_values = {col: [] for col in filter_cols}
+        self.facet_ids = {col: [] for col in filter_cols}
+        for col in filter_cols:
+            ids = {}
+            rows_by_value = defaultdict(list)
+            for idx, row in enumerate(self.rows):
+                raw = str(row.get(col) or "")
+                value = normalize_key(raw)
+                if value not in ids:
+                    ids[value] = len(ids)
+                    self.facet_values[col].append(raw)
+                rows_by_value[value].append(idx)
+                self.facet_ids[col].append(ids[value])
+            self.bitmaps[col] = {value: _bitmap(row_ids, len(self.rows)) for value, row_ids in rows_by_value.items()}
+
+        self.completer = Completer(self.bm25.doc_freqs, [row.get(self.key_col, "") for row in self.rows])
+
+    def neighbors(self, idx, k=RELATED_K):
+        """Up to k (row id, similarity) pairs most like row idx: cosine over L2-normalized TF-IDF vectors.
+
+        Dot products are accumulated through the postings of the row's own terms,
+        so only rows sharing a term are compared. Terms in more than half the rows
+        (or more than NEIGHBOR_MAX_DF rows) carry little signal and are left out,
+        which bounds the work per call on large files.
+        """
+        vectors = self._neighbor_vectors()
+        dots = defaultdict(float)
+        for term, w in vectors[idx].items():
+            for other, _ in self.bm25.postings[term]:
+                if other != idx:
+                    dots[other] += w * vectors[other][term]
+        best = heapq.nsmallest(k, dots.items(), key=lambda item: (-item[1], item[0]))
+        return tuple((other, round(sim, 4)) for other, sim in best if sim > 0)
+
+    def _neighbor_vectors(self):
+        """Per-row normalized TF-IDF vectors, built on the first neighbors() call and cached for this store"""
+        with _NEIGHBOR_LOCK:
+            vectors = _NEIGHBOR_VECTORS.get(self)
+            if vectors is None:
+                vectors = _NEIGHBOR_VECTORS[self] = self._build_vectors(self.bm25)
+        return vectors
+
+    @staticmethod
+    def _build_vectors(bm25, max_df_ratio=0.5):
+        max_df = min(max(2, int(bm25.N * max_df_ratio)), NEIGHBOR_MAX_DF)
+        weights = [[] for _ in range(bm25.N)]  # doc -> [(term, weight)]
+        for term, postings in bm25.postings.items():
+            if len(postings) > max_df:
+                continue
+            idf = bm25.idf[term]
+            for idx, tf in postings:
+                weights[idx].append((term, (1 + log(tf)) * idf))
+
+        vectors = []
+        for items in weights:
+            norm = sum(w * w for _, w in items) ** 0.5
+            vectors.append({term: w / norm for term, w in items})
+        return vectors
+
+    def resolve(self, row):
+        """Row id for an int id or a key-column value naming exactly one row (e.g. "Glassmorphism"), or None"""
+        if isinstance(row, int) or (isinstance(row, str) and row.strip().isdigit()):
+            idx = int(row)
+            return idx if 0 <= idx < len(self.rows) else None
+        ids = self.exact(row)
+        return ids[0] if len(ids) == 1 else None
+
+    def row_id(self, row):
+        """Return the index of a result row in this store, or None if unknown"""
+        for idx in self.by_key.get(normalize_key(row.get(self.key_col, "")), ()):
+            if self.rows[idx] == row:
+                return idx
+        return None
+
+    def _filter_col(self, col):
+        """Filterable column matching col case-insensitively; ValueError if there is none"""
+        for name in self.bitmaps:
+            if name.lower() == str(col).lower():
+                return name
+        available = ", ".join(self.bitmaps) or "none"
+        raise ValueError(f"Cannot filter on {col!r}. Filterable columns: {available}")
+
+    def facet_counts(self, docs, facets):
+        """Per-column {value: count} over the given row ids, most frequent first"""
+        counts = {}
+        for col in facets:
+            col = self._filter_col(col)
+            ids = self.facet_ids[col]
+            tally = Counter(ids[idx] for idx in docs)
+            names = self.facet_values[col]
+            counts[col] = {names[i]: n for i, n in sorted(tally.items(), key=lambda item: (-item[1], item[0]))}
+        return counts
+
+    def filter_mask(self, filters):
+        """Bitmap of the rows matching every {column: value or [values]} filter.
+
+        Values of one column are OR-ed, columns are AND-ed; comparison ignores
+        case and punctuation. Raises ValueError for a column without a bitmap index.
+        """
+        mask = (1 << len(self.rows)) - 1
+        for col, wanted in filters.items():
+            values = self.bitmaps[self._filter_col(col)]
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            column_mask = 0
+            for value in wanted:
+                column_mask |= values.get(normalize_key(value), 0)
+            mask &= column_mask
+        return mask
+
+    def exact(self, query):
+        """Ids of the rows whose key-column value equals the query up to case and punctuation"""
+        key = normalize_key(query)
+        return self.by_key.get(key, ()) if key else ()
+
+
+def index_dir():
+    """Folder holding compiled index artifacts, shared by every skill copy on the machine.
+
+    Artifacts are plain JSON and are never executed, but their content is served
+    as search results: keep the folder private (the default user cache dir is) and
+    do not point UI_UX_PRO_MAX_INDEX_DIR at a directory other users can write.
+    """
+    return Path(os.environ.get(INDEX_DIR_ENV) or user_cache_dir() / "indexes")
+
+
+def _artifact_path(fingerprint, layout):
+    """Artifact file for a CSV content fingerprint and index layout.
+
+    Named by content, not location, so byte-identical CSVs in different skill
+    copies resolve to the same artifact.
+    """
+    layout_hash = hashlib.sha256(repr((INDEX_FORMAT_VERSION, tuple(layout))).encode("utf-8")).hexdigest()
+    return index_dir() / f"{fingerprint[:32]}-{layout_hash[:16]}.json"
+
+
+# Only files this module writes are ever pruned: the index dir is user-configurable and may hold other files
+_ARTIFACT_NAME_RE = re.compile(r'^(?:[0-9a-f]{32}-[0-9a-f]{16}\.(?:json|pickle)|product-joins-[0-9a-f]{32}\.json)$')
+
+
+def prune_index_dir(folder):
+    """Delete index artifacts unused for INDEX_MAX_AGE, and pickled ones from older versions"""
+    cutoff = time.time() - INDEX_MAX_AGE
+    for path in folder.iterdir():
+        if not _ARTIFACT_NAME_RE.match(path.name):
+            continue
+        try:
+            if path.suffix == ".pickle" or path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass  # Removed concurrently
+
+
+def _load_or_build_row_store(filepath, fingerprint, layout):
+    """Load a row store from the shared artifact, building and publishing it if absent.
+
+    Loading an artifact refreshes its mtime; publishing a new one deletes
+    artifacts that no process has loaded for INDEX_MAX_AGE.
+    """
+    artifact = _artifact_path(fingerprint, layout)
+    try:
+        with open(artifact, 'r', encoding='utf-8') as f:
+            store = RowStore.from_state(layout, json.load(f))
+        store.filepath, store.fingerprint = str(filepath), fingerprint
+        try:
+            os.utime(artifact)
+        except OSError:
+            pass
+        return store
+    except Exception:
+        pass  # Missing, stale or unreadable artifact: rebuild below
+
+    store = RowStore(filepath, layout)
+    store.filepath, store.fingerprint = str(filepath), fingerprint
+    if file_fingerprint(filepath) != fingerprint:
+        return store  # Replaced while being read: not published, and rebuilt on next use
+    try:
+        artifact.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(artifact, json.dumps(store.to_state(), ensure_ascii=False, separators=(",", ":")))
+        prune_index_dir(artifact.parent)
+    except OSError:
+        pass  # Read-only or unavailable index dir: keep the in-memory index only
+    return store
+
+
+_ROW_STORES = {}
+_ROW_STORES_LOCK = threading.Lock()
+_REBUILDING = set()  # _ROW_STORES keys with a background rebuild in flight
+
+
+def _get_row_store(filepath, layout):
+    """Row store for a CSV file, loaded once per process.
+
+    When the file has changed since its store was loaded, the current store is
+    still returned and a rebuild is started in the background (at most one per
+    store); the new store replaces it once built, as with reload_indexes(). Only
+    the first load of a file is built on the calling thread. Anything labelled
+    with the data a result came from must use the returned store's fingerprint
+    (see data_version), not the file's.
+    """
+    key = (str(filepath), layout)
+    entry = _ROW_STORES.get(key)
+    if entry is None:
+        with _ROW_STORES_LOCK:
+            entry = _ROW_STORES.get(key)
+            if entry is None:
+                fingerprint = file_fingerprint(filepath)
+                entry = _ROW_STORES[key] = (fingerprint, _load_or_build_row_store(filepath, fingerprint, layout))
+    elif entry[0] != file_fingerprint(filepath):
+        _rebuild_in_background(key)
+    return entry[1]
+
+
+def _rebuild_in_background(key):
+    with _ROW_STORES_LOCK:
+        if key in _REBUILDING:
+            return
+        _REBUILDING.add(key)
+
+    def rebuild():
+        try:
+            _refresh_row_store(key)
+        finally:
+            with _ROW_STORES_LOCK:
+                _REBUILDING.discard(key)
+
+    threading.Thread(target=rebuild, daemon=True).start()
+
+
+def _refresh_row_store(key):
+    """Build the store for key off to the side if its CSV changed, then publish it; True if replaced"""
+    filepath = Path(key[0])
     if not filepath.exists():
-        return []
+        return False
+    current = file_fingerprint(filepath)
+    entry = _ROW_STORES.get(key)
+    if entry is not None and entry[0] == current:
+        return False
+    store = _load_or_build_row_store(filepath, current, key[1])
+    with _ROW_STORES_LOCK:
+        _ROW_STORES[key] = (current, store)
+    return True
+
 
-    data = _load_csv(filepath)
+def reload_indexes():
+    """Rebuild every loaded row store whose CSV changed and swap the new ones in.
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    Each store is built off to the side, then published by replacing its
+    _ROW_STORES entry in a single assignment; concurrent searches see either
+    the old or the new store, never a partly built one. Returns the number of
+    stores replaced.
+    """
+    return sum(_refresh_row_store(key) for key in list(_ROW_STORES))
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+def build_indexes():
+    """Compile the shared index artifact for every domain and stack; return the artifact paths"""
+    targets = [(DATA_DIR / c["file"], _layout(c)) for c in CSV_CONFIG.values()]
+    targets += [(DATA_DIR / c["file"], _layout(_STACK_COLS)) for c in STACK_CONFIG.values()]
+    artifacts = []
+    for filepath, layout in targets:
+        if filepath.exists():
+            store = _get_row_store(filepath, layout)
+            artifacts.append(str(_artifact_path(store.fingerprint, layout)))
+    return artifacts
 
-    return results
+
+def get_row_store(domain, load=True):
+    """Return the loaded row store for a domain, or None if its file is missing.
+
+    With load=False, returns None unless this process has already loaded the store.
+    """
+    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+    filepath = DATA_DIR / config["file"]
+    if not load:
+        entry = _ROW_STORES.get((str(filepath), _layout(config)))
+        return entry[1] if entry is not None else None
+    if not filepath.exists():
+        return None
+    return _get_row_store(filepath, _layout(config))
+
+
+_RANKED = OrderedDict()  # (store, query, allowed) -> [(-score, doc)] ascending, i.e. best first
+_RANKED_LOCK = threading.Lock()
+
+
+def _ranked(store, query, allowed):
+    """Every positive-score match in result order, from an LRU so later pages skip rescoring"""
+    key = (store, query, allowed)
+    with _RANKED_LOCK:
+        ranked = _RANKED.get(key)
+        if ranked is not None:
+            _RANKED.move_to_end(key)
+            return ranked
+    scores = store.bm25.accumulate(query, allowed)
+    ranked = sorted((-total, idx) for idx, total in scores.items() if total > 0)
+    with _RANKED_LOCK:
+        _RANKED[key] = ranked
+        while len(_RANKED) > RANKED_CACHE_SIZE:
+            _RANKED.popitem(last=False)
+    return ranked
+
+
+def _encode_cursor(state):
+    return base64.urlsafe_b64encode(json.dumps(state, sort_keys=True, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor, query, target, filters, version):
+    """(score, doc, skipped docs) to resume after; ValueError if the cursor is malformed or belongs to another search"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        score, doc = state["s"], state["i"]
+        after = (None, None) if score is None and doc is None else (float(score), int(doc))
+        after += (tuple(int(idx) for idx in state.get("x", ())),)
+    except (ValueError, KeyError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if state.get("q") != query or state.get("d") != target or state.get("f") != (filters or None):
+        raise ValueError("Cursor belongs to a different query, domain or filter set")
+    if state.get("v") != version:
+        raise ValueError("Cursor is stale: the data changed since it was issued; search again")
+    return after
+
+
+def _matches_others(bm25, query, ids, allowed):
+    """Whether any allowed document outside ids contains a query term (every such document scores > 0)"""
+    shown = set(ids)
+    for term in set(bm25.tokenize(query)):
+        for idx in bm25.doc_ids.get(term, ()):
+            if idx not in shown and (allowed is None or allowed >> idx & 1):
+                return True
+    return False
+
+
+def _search_csv(store, query, max_results, max_edits=MAX_EDITS, filters=None, facets=None, after=None):
+    """Core search function using BM25.
+
+    Returns (results, extras) where extras holds the optional result fields:
+    "corrections" (typos fixed), "fast_path" (exact row name) and "facets",
+    plus "after": the (score, doc, skipped docs) of the last result when more
+    results follow. after resumes the ranking behind that (score, doc) from a
+    previous page, or from the top when both are None, leaving out the skipped
+    docs (rows a fast-path first page already returned).
+    """
+    layout = store.layout
+    allowed = store.filter_mask(filters) if filters else None
+    if facets is True:
+        facets = list(store.bitmaps)
+
+    # Exact name of a row (e.g. "Glassmorphism"): return the rows with that name without tokenizing
+    # or scoring. Facets count every matching row, so they always take the scoring path, and so does
+    # a name shared by more rows than fit on one page.
+    if layout.key_col and max_results > 0 and not facets and after is None:
+        ids = [idx for idx in store.exact(query) if allowed is None or allowed >> idx & 1]
+        if ids and len(ids) <= max_results:
+            extras = {"fast_path": True}
+            if _matches_others(store.bm25, query, ids, allowed):
+                # Later pages continue with the scored ranking, less the rows shown here
+                extras["after"] = (None, None, tuple(ids))
+            return [dict(store.rows[idx]) for idx in ids], extras
+
+    query, corrections = store.bm25.correct_query(query, max_edits)
+    extras = {"corrections": corrections} if corrections else {}
+
+    max_results = max(max_results, 0)
+    if facets or after is not None:
+        # Facets need every match and later pages resume inside the full ranking:
+        # both read the ranked list, which stays cached for the following pages.
+        # Order is (score desc, doc id asc), the same tie-break as top_k.
+        ranked = _ranked(store, query, allowed)
+        if facets:
+            extras["facets"] = store.facet_counts([idx for _, idx in ranked], facets)
+            extras["matched"] = len(ranked)
+        if after is not None and after[2]:
+            skipped = set(after[2])
+            ranked = [entry for entry in ranked if entry[1] not in skipped]
+        start = 0 if after is None or after[0] is None else bisect.bisect_right(ranked, (-after[0], after[1]))
+        top = [(idx, -neg) for neg, idx in ranked[start:start + max_results]]
+        more = start + max_results < len(ranked)
+    else:
+        # Top results with score > 0; one extra tells whether another page exists
+        top = store.bm25.top_k(query, max_results + 1, allowed)
+        more = len(top) > max_results
+        top = top[:max_results]
+
+    if more and top:
+        extras["after"] = (top[-1][1], top[-1][0], after[2] if after is not None else ())
+    return [dict(store.rows[idx]) for idx, _ in top], extras
+
+
+def related(domain, row, k=5):
+    """Rows most similar to a given row (by id or key-column value), computed on demand"""
+    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+    store = get_row_store(domain)
+    if store is None:
+        return {"error": f"File not found: {DATA_DIR / config['file']}", "domain": domain}
+    row_id = store.resolve(row)
+    if row_id is None:
+        ids = store.exact(row) if isinstance(row, str) else ()
+        if len(ids) > 1:
+            return {"error": f"Ambiguous {store.key_col}: {row} names rows {', '.join(map(str, ids))}; pass a row id",
+                    "domain": domain}
+        return {"error": f"Unknown {store.key_col}: {row}", "domain": domain}
+
+    neighbors = store.neighbors(row_id, min(k, RELATED_K))
+    return {
+        "domain": domain,
+        "query": store.rows[row_id].get(store.key_col, str(row)),
+        "row_id": row_id,
+        "file": config["file"],
+        "data_version": data_version([store]),
+        "count": len(neighbors),
+        "results": [dict(store.rows[idx]) for idx, _ in neighbors],
+        "row_ids": [idx for idx, _ in neighbors],
+        "similarities": [sim for _, sim in neighbors]
+    }
+
+
+def complete(prefix, domain="style", k=10):
+    """Autocomplete a prefix against a domain's vocabulary and row names, ranked by document frequency"""
+    store = get_row_store(domain)
+    if store is None:
+        return []
+    return [{"text": text, "df": df, "kind": kind} for text, df, kind in store.completer.complete(prefix, k)]
 
 
 def detect_domain(query):
@@ -209,8 +1393,30 @@ def detect_domain(query):
     return best if scores[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
+def _paginate(result, extras, target, filters):
+    """Fold _search_csv extras into a result, turning the resume point into an opaque next_cursor"""
+    after = extras.pop("after", None)
+    result.update(extras)
+    if after is not None:
+        state = {
+            "q": result["query"], "d": target, "f": filters or None,
+            "v": result["data_version"], "s": after[0], "i": after[1]
+        }
+        if after[2]:
+            state["x"] = list(after[2])
+        result["next_cursor"] = _encode_cursor(state)
+    return result
+
+
+def search(query, domain=None, max_results=MAX_RESULTS, max_edits=MAX_EDITS, filters=None, facets=None, cursor=None):
+    """Main search function with auto-domain detection.
+
+    filters restricts results to rows whose categorical columns match, e.g.
+    {"Severity": "High", "Platform": ["Web", "All"]}. facets (a list of those
+    columns, or True for all of them) adds per-value counts over every match.
+    When more results exist the result carries next_cursor; pass it back as
+    cursor (same query, domain and filters) for the next page.
+    """
     if domain is None:
         domain = detect_domain(query)
 
@@ -220,18 +1426,29 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    # The version describes the store searched, which lags the file while its rebuild is pending
+    store = _get_row_store(filepath, _layout(config))
+    version = data_version([store])
+    try:
+        after = _decode_cursor(cursor, query, domain, filters, version) if cursor else None
+        results, extras = _search_csv(store, query, max_results, max_edits, filters, facets, after)
+    except ValueError as e:
+        return {"error": str(e), "domain": domain}
 
-    return {
+    result = {
         "domain": domain,
         "query": query,
         "file": config["file"],
+        "data_version": version,
         "count": len(results),
         "results": results
     }
+    if filters:
+        result["filters"] = filters
+    return _paginate(result, extras, domain, filters)
 
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
+def search_stack(query, stack, max_results=MAX_RESULTS, max_edits=MAX_EDITS, filters=None, facets=None, cursor=None):
     """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
@@ -241,13 +1458,83 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    store = _get_row_store(filepath, _layout(_STACK_COLS))
+    version = data_version([store])
+    try:
+        after = _decode_cursor(cursor, query, f"stack:{stack}", filters, version) if cursor else None
+        results, extras = _search_csv(store, query, max_results, max_edits, filters, facets, after)
+    except ValueError as e:
+        return {"error": str(e), "stack": stack}
 
-    return {
+    result = {
         "domain": "stack",
         "stack": stack,
         "query": query,
         "file": STACK_CONFIG[stack]["file"],
+        "data_version": version,
         "count": len(results),
         "results": results
     }
+    if filters:
+        result["filters"] = filters
+    return _paginate(result, extras, f"stack:{stack}", filters)
+
+
+# ============ COMPACT OUTPUT ============
+COMPACT_FORMATS = ["columns", "tsv", "msgpack"]
+
+
+def to_columnar(result):
+    """Result dict with its "results" rows as {"columns": [...], "rows": [[...]]}; other dicts unchanged"""
+    rows = result.get("results")
+    if not isinstance(rows, list):
+        return result
+    columns = []
+    for row in rows:
+        columns.extend(col for col in row if col not in columns)
+    compact = {key: value for key, value in result.items() if key != "results"}
+    compact["columns"] = columns
+    compact["rows"] = [[row.get(col, "") for col in columns] for row in rows]
+    return compact
+
+
+def _tsv_cell(value):
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "")
+
+
+def _flatten(value, prefix=""):
+    """(dotted path, scalar) pairs of a nested dict/list"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from _flatten(item, f"{prefix}.{i}")
+    else:
+        yield prefix, value
+
+
+def to_tsv(result):
+    """Search results as a header line plus one line per row; any other dict as "path<TAB>value" lines"""
+    if isinstance(result.get("results"), list):
+        table = to_columnar(result)
+        lines = ["\t".join(_tsv_cell(col) for col in table["columns"])]
+        lines += ["\t".join(_tsv_cell(cell) for cell in row) for row in table["rows"]]
+    else:
+        lines = [f"{_tsv_cell(path)}\t{_tsv_cell('' if value is None else value)}" for path, value in _flatten(result)]
+    return "\n".join(lines)
+
+
+def encode_compact(result, fmt):
+    """Encode a search result or design system in a compact format: str for columns/tsv, bytes for msgpack"""
+    if fmt == "columns":
+        return json.dumps(to_columnar(result), ensure_ascii=False, separators=(",", ":"))
+    if fmt == "tsv":
+        return to_tsv(result)
+    if fmt == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            raise ValueError("MessagePack output requires msgpack (pip install msgpack); use --compact columns instead")
+        return msgpack.packb(to_columnar(result), use_bin_type=True)
+    raise ValueError(f"Unknown compact format: {fmt}. Available: {', '.join(COMPACT_FORMATS)}")